@@ -0,0 +1 @@
+python3 -m bench.bench_pipeline "$@"
@@ -0,0 +1,90 @@
+# Memory benchmark for the node classes
+# python3 -m bench.bench_memory [--blocks N] [--output FILE]
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tracemalloc
+
+from src.textnode import TextNode, TextType
+from src.htmlnode import LeafNode, ParentNode
+from src.markdown_converter import markdown_to_html_node
+
+from .corpus import generate_markdown
+
+NODE_SAMPLES = 100_000
+
+
+def count_nodes(node) -> int:
+    total = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        total += 1
+        if current.children:
+            stack.extend(current.children)
+    return total
+
+
+def bytes_per_instance(factory) -> float:
+    # Traced allocation of N live instances divided by N, so dict/slot overhead shows up (getsizeof misses the __dict__)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = [factory(n) for n in range(NODE_SAMPLES)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding them isn't part of the node
+    per_node = (after - before - sys.getsizeof(keep)) / NODE_SAMPLES
+    del keep
+    return round(per_node, 1)
+
+
+def run(blocks:int) -> dict:
+    shared_text = "shared text"
+    results = {
+        'bytes_per_node': {
+            'TextNode': bytes_per_instance(lambda n: TextNode(shared_text, TextType.BOLD)),
+            'LeafNode': bytes_per_instance(lambda n: LeafNode('b', shared_text)),
+            'ParentNode': bytes_per_instance(lambda n: ParentNode('p', [None])),  # type: ignore
+        },
+    }
+
+    markdown = generate_markdown(random.Random(0), blocks)
+    gc.collect()
+    tracemalloc.start()
+    document = markdown_to_html_node(markdown)
+    build_current, build_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    nodes = count_nodes(document)
+    results['document'] = {
+        'blocks': blocks,
+        'markdown_bytes': len(markdown.encode('utf-8')),
+        'nodes': nodes,
+        'tree_bytes': build_current,
+        'tree_bytes_per_node': round(build_current / nodes, 1),
+        'peak_bytes': build_peak,
+    }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reports bytes per node and peak memory for a large synthetic document")
+    parser.add_argument('--blocks', type=int, default=50_000, help="Markdown blocks in the synthetic document")
+    parser.add_argument('--output', default=None, help="Write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = json.dumps(run(args.blocks), indent=2)
+    if args.output is None:
+        print(report)
+    else:
+        with open(args.output, 'w') as dest:
+            dest.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
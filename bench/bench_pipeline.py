@@ -0,0 +1,144 @@
+# Times each stage of the build separately over a synthetic corpus and reports JSON
+# python3 -m bench.bench_pipeline [--pages N] [--blocks N] [--features ...] [--repeat N] [--output FILE]
+from __future__ import annotations
+from typing import Callable, Dict, List
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+
+from src.markdown_helpers import markdown_to_blocks, block_to_block_type, trim_md_chars, BlockType
+from src.markdown_converter import text_to_text_blocks, markdown_to_html_node
+from src import main as site_main
+
+from .corpus import generate_markdown, write_corpus, add_corpus_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_of(repeat:int, func:Callable[[], int]) -> Dict[str, float]:
+    # func does one full pass and returns how many calls it made, we keep the fastest pass
+    best = None
+    calls = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        calls = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    assert best is not None
+    return {
+        'seconds': round(best, 6),
+        'calls': calls,
+        'us_per_call': round(best / calls * 1e6, 3) if calls else 0.0,
+    }
+
+
+def time_stages(documents:List[str], repeat:int) -> Dict[str, Dict[str, float]]:
+    # Inputs for each stage get built up front so each timing only covers its own stage
+    blocks = [block for doc in documents for block in markdown_to_blocks(doc)]
+    typed = [(block, block_to_block_type(block)) for block in blocks]
+    inline = [trim_md_chars(block, block_type) for block, block_type in typed if block_type != BlockType.CODE]
+    trees = [markdown_to_html_node(doc) for doc in documents]
+
+    def split_blocks():
+        for doc in documents:
+            markdown_to_blocks(doc)
+        return len(documents)
+
+    def type_blocks():
+        for block in blocks:
+            block_to_block_type(block)
+        return len(blocks)
+
+    def split_inline():
+        for text in inline:
+            text_to_text_blocks(text)
+        return len(inline)
+
+    def build_trees():
+        for doc in documents:
+            markdown_to_html_node(doc)
+        return len(documents)
+
+    def render_trees():
+        for tree in trees:
+            tree.to_html()
+        return len(trees)
+
+    return {
+        'markdown_to_blocks': best_of(repeat, split_blocks),
+        'block_to_block_type': best_of(repeat, type_blocks),
+        'text_to_text_blocks': best_of(repeat, split_inline),
+        'markdown_to_html_node': best_of(repeat, build_trees),
+        'to_html': best_of(repeat, render_trees),
+    }
+
+
+def time_full_build(args, repeat:int) -> Dict[str, float]:
+    # main() works off ./content, ./static and ./template, so give it a scratch site to run in
+    with tempfile.TemporaryDirectory() as site_root:
+        write_corpus(os.path.join(site_root, 'content'), args.pages, args.blocks, args.features, args.size, args.seed)
+        shutil.copytree(os.path.join(REPO_ROOT, 'static'), os.path.join(site_root, 'static'))
+        shutil.copytree(os.path.join(REPO_ROOT, 'template'), os.path.join(site_root, 'template'))
+
+        def full_build():
+            with contextlib.redirect_stdout(io.StringIO()):
+                site_main.main(['--full', '--jobs', str(args.jobs)])
+            return args.pages
+
+        cwd = os.getcwd()
+        os.chdir(site_root)
+        try:
+            return best_of(repeat, full_build)
+        finally:
+            os.chdir(cwd)
+
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    documents = [generate_markdown(rng, args.blocks, args.features, args.size) for _ in range(args.pages)]
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'pages': args.pages,
+            'blocks_per_page': args.blocks,
+            'features': args.features,
+            'markdown_bytes': sum(len(doc.encode('utf-8')) for doc in documents),
+            'repeat': args.repeat,
+            'jobs': args.jobs,
+        },
+        'stages': time_stages(documents, args.repeat),
+    }
+    if not args.skip_build:
+        results['stages']['main'] = time_full_build(args, args.repeat)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times each build stage over a synthetic corpus")
+    add_corpus_args(parser)
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage, the fastest one is reported")
+    parser.add_argument('--jobs', type=int, default=1, help="--jobs passed to the full build")
+    parser.add_argument('--skip-build', action='store_true', help="Only time the in-memory stages")
+    parser.add_argument('--output', default=None, help="Write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = json.dumps(run(args), indent=2)
+    if args.output is None:
+        print(report)
+    else:
+        with open(args.output, 'w') as dest:
+            dest.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# Times ParentNode.to_html on very wide and very deep trees against the old recursive version
+# python3 -m bench.bench_tree [--width N] [--depth N] [--repeat N] [--output FILE]
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+
+from src.htmlnode import HTMLNode, LeafNode, ParentNode
+
+from .bench_pipeline import best_of
+
+
+def recursive_html(node:HTMLNode) -> str:
+    # What ParentNode.to_html used to be, kept here to compare against
+    if not isinstance(node, ParentNode):
+        return node.to_html()
+    parts = [recursive_html(child) for child in node.children]  # type: ignore[union-attr]
+    return f'<{node.tag}{node.props_to_html()}>' + ''.join(parts) + f'</{node.tag}>'
+
+
+def wide_tree(width:int) -> ParentNode:
+    # One div with width paragraphs, like a long page
+    return ParentNode('div', [
+        ParentNode('p', [LeafNode(None, f'text {idx} '), LeafNode('a', 'link', {'href': f'/page/{idx}'})])
+        for idx in range(width)
+    ])
+
+
+def deep_tree(depth:int) -> ParentNode:
+    # depth nested blockquotes with a paragraph at the bottom
+    node = ParentNode('p', [LeafNode('b', 'bottom')])
+    for _ in range(depth):
+        node = ParentNode('blockquote', [node])
+    return node
+
+
+def time_tree(root:ParentNode, repeat:int) -> dict:
+    html = root.to_html()
+    result = {'iterative': best_of(repeat, lambda: root.to_html() and 1)}
+    try:
+        identical = recursive_html(root) == html
+        result['recursive'] = best_of(repeat, lambda: recursive_html(root) and 1)
+        result['identical'] = identical
+    except RecursionError:
+        result['recursive'] = f'RecursionError (limit {sys.getrecursionlimit()})'
+    result['html_bytes'] = len(html.encode('utf-8'))
+    return result
+
+
+def run(width:int, depth:int, repeat:int) -> dict:
+    return {
+        'wide': {'width': width, **time_tree(wide_tree(width), repeat)},
+        'deep': {'depth': depth, **time_tree(deep_tree(depth), repeat)},
+        'deep_within_limit': {'depth': 200, **time_tree(deep_tree(200), repeat * 10)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Times to_html on wide and deep trees, iterative vs recursive")
+    parser.add_argument('--width', type=int, default=100_000, help="Paragraphs in the wide tree")
+    parser.add_argument('--depth', type=int, default=50_000, help="Nesting depth of the deep tree")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per tree, the fastest is reported")
+    parser.add_argument('--output', default=None, help="Write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = json.dumps(run(args.width, args.depth, args.repeat), indent=2)
+    if args.output is None:
+        print(report)
+    else:
+        with open(args.output, 'w') as dest:
+            dest.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
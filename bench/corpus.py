@@ -0,0 +1,106 @@
+# Synthetic content generator for the benchmarks
+# python3 -m bench.corpus OUTPUT_DIR [--pages N] [--blocks N] [--features headers,lists,...]
+from __future__ import annotations
+from typing import List, Sequence
+
+import argparse
+import os
+import random
+
+FEATURES = ('headers', 'paragraphs', 'lists', 'quotes', 'code', 'links', 'images')
+
+WORDS = ("the", "ring", "elf", "road", "goes", "ever", "on", "river", "hobbit", "song", "old", "forest",
+         "willow", "lamp", "dark", "star", "valley", "house", "last", "homely", "east", "sea", "tom")
+
+
+def words(rng:random.Random, count:int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def inline_text(rng:random.Random, features:Sequence[str], count:int) -> str:
+    # A run of prose with the odd bit of inline markup sprinkled in
+    parts = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.1:
+            parts.append(f"**{words(rng, 2)}**")
+        elif roll < 0.2:
+            parts.append(f"_{words(rng, 2)}_")
+        elif roll < 0.25:
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        elif roll < 0.32 and 'links' in features:
+            parts.append(f"[{words(rng, 2)}](/blog/{rng.choice(WORDS)})")
+        elif roll < 0.35 and 'images' in features:
+            parts.append(f"![{words(rng, 2)}](/images/{rng.choice(WORDS)}.png)")
+        else:
+            parts.append(words(rng, 3))
+    return ' '.join(parts)
+
+
+def generate_block(rng:random.Random, features:Sequence[str], size:int) -> str:
+    match rng.choice(features):
+        case 'headers':
+            return f"{'#' * rng.randint(2, 6)} {words(rng, 4)}"
+        case 'lists':
+            if rng.random() < 0.5:
+                return '\n'.join(f"- {inline_text(rng, features, 3)}" for _ in range(rng.randint(2, 6)))
+            # ordered lists only go to 9 (the validator reads one digit)
+            return '\n'.join(f"{n}. {inline_text(rng, features, 3)}" for n in range(1, rng.randint(2, 9) + 1))
+        case 'quotes':
+            return '\n'.join(f"> {inline_text(rng, features, 3)}" for _ in range(rng.randint(1, 4)))
+        case 'code':
+            lines = '\n'.join(f"    {words(rng, 5)}" for _ in range(rng.randint(2, 8)))
+            return f"```\n{lines}\n```"
+        case _:
+            # links / images / paragraphs all end up as a paragraph, the inline mix handles the rest
+            return '\n'.join(inline_text(rng, features, size) for _ in range(rng.randint(1, 4)))
+
+
+def generate_markdown(rng:random.Random, blocks:int, features:Sequence[str] = FEATURES, size:int = 8) -> str:
+    parts = [f"# {words(rng, 4)}"]
+    parts.extend(generate_block(rng, features, size) for _ in range(blocks))
+    return '\n\n'.join(parts) + '\n'
+
+
+def write_corpus(root:str, pages:int, blocks:int = 40, features:Sequence[str] = FEATURES, size:int = 8, seed:int = 0) -> List[str]:
+    # Lays pages out like content/ does: root/index.md plus root/page{N}/index.md
+    rng = random.Random(seed)
+    written = []
+    for idx in range(pages):
+        page_dir = root if idx == 0 else os.path.join(root, f'page{idx}')
+        os.makedirs(page_dir, exist_ok=True)
+        path = os.path.join(page_dir, 'index.md')
+        with open(path, 'w', encoding='utf-8') as dest:
+            dest.write(generate_markdown(rng, blocks, features, size))
+        written.append(path)
+    return written
+
+
+def parse_features(text:str) -> List[str]:
+    features = [feature.strip() for feature in text.split(',') if feature.strip()]
+    for feature in features:
+        if feature not in FEATURES:
+            raise argparse.ArgumentTypeError(f"Unknown feature {feature} (pick from {', '.join(FEATURES)})")
+    return features
+
+
+def add_corpus_args(parser:argparse.ArgumentParser) -> None:
+    parser.add_argument('--pages', type=int, default=200, help="Number of pages to generate")
+    parser.add_argument('--blocks', type=int, default=40, help="Markdown blocks per page")
+    parser.add_argument('--size', type=int, default=8, help="Inline runs per paragraph line")
+    parser.add_argument('--features', type=parse_features, default=list(FEATURES), help="Comma separated mix of " + ','.join(FEATURES))
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Writes a synthetic markdown content tree")
+    parser.add_argument('output', help="Directory to write the content tree into")
+    add_corpus_args(parser)
+    args = parser.parse_args(argv)
+
+    written = write_corpus(args.output, args.pages, args.blocks, args.features, args.size, args.seed)
+    print(f"Wrote {len(written)} page(s) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
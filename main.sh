@@ -1,2 +1,4 @@
-python3 -m src.main
-cd public && python3 -m http.server 8888
+python3 -m src.main --watch &
+WATCH_PID=$!
+trap 'kill $WATCH_PID' EXIT
+cd docs && python3 -m http.server 8888
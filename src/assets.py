@@ -0,0 +1,54 @@
+from __future__ import annotations
+from typing import Dict, Iterable
+
+import fnmatch
+import json
+import os
+
+from .manifest import hash_file
+from .output import OutputResult, write_output
+
+FINGERPRINT_LENGTH = 12  # hex chars of the sha256, plenty to never collide within one site
+ASSET_MANIFEST = 'asset-manifest.json'
+
+# Things that have to keep their name: hosting config, crawlers and browsers look for these exact paths
+FINGERPRINT_EXCLUDE = ('CNAME', '.nojekyll', 'robots.txt', 'favicon.ico', '*.html', '*.txt', '*.xml', '*.webmanifest')
+
+
+def should_fingerprint(rel_path:str) -> bool:
+    name = os.path.basename(rel_path)
+    return not any(fnmatch.fnmatch(name, pattern) for pattern in FINGERPRINT_EXCLUDE)
+
+
+def fingerprint_name(rel_path:str, digest:str) -> str:
+    # images/tolkien.png -> images/tolkien.3f2a9c1b04de.png
+    root, ext = os.path.splitext(rel_path)
+    return f'{root}.{digest[:FINGERPRINT_LENGTH]}{ext}'
+
+
+def build_asset_map(src_root:str, rel_paths:Iterable[str]) -> Dict[str, str]:
+    # relative source path -> relative output path, for every static file (excluded ones map to themselves)
+    assets = {}
+    for rel_path in rel_paths:
+        if should_fingerprint(rel_path):
+            assets[rel_path] = fingerprint_name(rel_path, hash_file(os.path.join(src_root, rel_path)))
+        else:
+            assets[rel_path] = rel_path
+    return assets
+
+
+def asset_urls(assets:Dict[str, str]) -> Dict[str, str]:
+    # Same map as root relative urls, which is what shows up in markdown and the template
+    urls = {}
+    for rel_path, output in assets.items():
+        if rel_path == output:
+            continue
+        urls['/' + rel_path.replace(os.sep, '/')] = '/' + output.replace(os.sep, '/')
+    return urls
+
+
+def write_asset_manifest(dest_root:str, assets:Dict[str, str]) -> OutputResult:
+    # For anything outside the build that needs to find an asset (deploy scripts, cache header rules)
+    text = json.dumps({rel_path.replace(os.sep, '/'): output.replace(os.sep, '/') for rel_path, output in assets.items()},
+                      indent=1, sort_keys=True)
+    return write_output(os.path.join(dest_root, ASSET_MANIFEST), text + '\n')
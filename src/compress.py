@@ -0,0 +1,148 @@
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import gzip
+import os
+
+from .manifest import remove_output
+from .output import OutputStats, UMASK
+from .parallel import run_parallel
+from .static_sync import list_files
+
+# Optional encoders - used when they're installed, skipped when they aren't
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd  # type: ignore[import-not-found]  # stdlib from 3.14
+except ImportError:
+    try:
+        import zstandard as zstd  # type: ignore[import-not-found, no-redef]
+    except ImportError:
+        zstd = None
+
+COMPRESSIBLE = ('.html', '.css', '.js', '.mjs', '.json', '.svg', '.txt', '.xml', '.map')
+SIBLING_EXTS = ('.gz', '.br', '.zst')
+MIN_SIZE = 256  # below this the headers eat whatever gzip saves
+
+Encoder = Callable[[bytes], bytes]
+
+
+def gzip_encode(data:bytes) -> bytes:
+    # mtime=0 so the same page always compresses to the same bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def brotli_encode(data:bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+def zstd_encode(data:bytes) -> bytes:
+    # compression.zstd and zstandard both spell it the same way
+    return zstd.compress(data, level=19)
+
+
+# extension -> encoder, in the order we'd like the host to prefer them
+ENCODERS: Dict[str, Encoder] = {'.gz': gzip_encode}
+if brotli is not None:
+    ENCODERS['.br'] = brotli_encode
+if zstd is not None:
+    ENCODERS['.zst'] = zstd_encode
+
+
+def resolve_formats(spec:str) -> List[str]:
+    # 'all' or a comma list like 'gz,br' -> ['.gz', '.br'], asking for one that isn't installed is an error
+    if spec == 'all':
+        return list(ENCODERS)
+    formats = []
+    for name in spec.split(','):
+        ext = '.' + name.strip().lstrip('.')
+        if ext not in ENCODERS:
+            raise ValueError(f"Compression format {name.strip()} isn't available (have: {', '.join(ext[1:] for ext in ENCODERS)})")
+        formats.append(ext)
+    return formats
+
+
+def is_compressible(path:str) -> bool:
+    return path.endswith(COMPRESSIBLE)
+
+
+def compress_file(path:str, formats:Sequence[str]) -> Tuple[int, int, List[str]]:
+    # Writes path.gz (etc) next to path, returns (written, unchanged, the siblings that are now up to date)
+    # Each sibling gets path's mtime, so a sibling with the same mtime is already up to date.  Outputs that didn't
+    # change keep their mtime (output.py), so only pages that actually changed get compressed again
+    # Siblings that shouldn't exist any more (file got too small, encoding stopped paying off) are left for
+    # compress_tree to remove, only it knows which ones are ours
+    stat = os.stat(path)
+    written = unchanged = 0
+    siblings: List[str] = []
+    if stat.st_size < MIN_SIZE:
+        return written, unchanged, siblings
+
+    data = None
+    for ext in formats:
+        sibling = path + ext
+        try:
+            if os.stat(sibling).st_mtime_ns == stat.st_mtime_ns:
+                unchanged += 1
+                siblings.append(sibling)
+                continue
+        except FileNotFoundError:
+            pass
+
+        if data is None:
+            with open(path, 'rb') as src:
+                data = src.read()
+        encoded = ENCODERS[ext](data)
+        if len(encoded) >= len(data):
+            continue  # not worth serving
+
+        temp_path = f'{os.path.dirname(sibling)}{os.sep}.tmp-{os.getpid()}-{os.path.basename(sibling)}'
+        with open(temp_path, 'wb') as dest:
+            dest.write(encoded)
+        os.chmod(temp_path, 0o666 & ~UMASK)
+        os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(temp_path, sibling)
+        written += 1
+        siblings.append(sibling)
+    return written, unchanged, siblings
+
+
+def compress_tree(root:str, formats:Sequence[str], jobs:int = 1, previous:Iterable[str] = (),
+                  static:Iterable[str] = ()) -> Tuple[OutputStats, List[str]]:
+    # Brings the siblings of every text output under root up to date, returns the stats and the siblings (relative
+    # to root) that exist now - that list goes in the manifest and comes back as previous next build
+    # Only siblings this step made last time (previous) ever get deleted.  A static data.json.gz is not ours
+    # (and doesn't get overwritten either), no formats at all removes everything we made
+    stats = OutputStats()
+    not_ours = set(static)
+    work = []
+    for rel_path in list_files(root) if formats else []:
+        if not is_compressible(rel_path):
+            continue
+        wanted = [ext for ext in formats if rel_path + ext not in not_ours]
+        if wanted:
+            work.append((os.path.join(root, rel_path), wanted))
+
+    previous = list(previous)
+    current: List[str] = []
+    failures = []
+    for (path, wanted), (ok, result) in zip(work, run_parallel(compress_file, work, jobs)):
+        if not ok:
+            # Whatever it had stays (and stays ours) until it compresses again
+            failures.append((path, result))
+            rel_path = os.path.relpath(path, root)
+            current.extend(sibling for sibling in previous if sibling in {rel_path + ext for ext in wanted})
+            continue
+        stats.written += result[0]
+        stats.unchanged += result[1]
+        current.extend(os.path.relpath(sibling, root) for sibling in result[2])
+
+    keep = set(current)
+    for rel_path in previous:
+        if rel_path not in keep and rel_path not in not_ours and remove_output(os.path.join(root, rel_path), root):
+            stats.removed += 1
+
+    for path, err in failures:
+        print(f"Couldn't compress {path}: {type(err).__name__}: {err}")
+    return stats, sorted(current)
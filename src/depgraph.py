@@ -0,0 +1,78 @@
+from __future__ import annotations
+from typing import Dict, List
+
+import os
+
+from .manifest import BuildManifest
+from .markdown_helpers import iter_markdown_blocks
+from .render_context import extract_root_urls
+from .static_sync import list_files
+
+# The dependency graph lives in the build manifest:
+#   page -> its markdown (the key), the template (template_hash) and the urls it shows / links to (entry['assets'])
+#   template -> the assets it links to (manifest.template_assets), which makes them dependencies of every page
+# This is the querying side of it
+
+
+def page_assets(path:str, assets:Dict[str, str] | None = None) -> Dict[str, str]:
+    # Root relative urls a markdown file emits, images and links both -> what they resolve to with the current
+    # asset names.  RenderContext.url rewrites both, so a link to /images/tom.png goes stale just like an image does
+    # Keyed by the path without ?query / #fragment, the same thing RenderContext.url looks up
+    # A block at a time, the same blocks the converter sees - an image or link can wrap onto the next line,
+    # but never past a blank one, and huge pages still aren't read in whole
+    assets = assets or {}
+    found = {}
+    with open(path, 'r') as src:
+        for block in iter_markdown_blocks(src):
+            for url in extract_root_urls(block):
+                found[url] = assets.get(url, url)
+    return found
+
+
+def asset_url(path:str, static_root:str) -> str:
+    # static/images/a.png, images/a.png and /images/a.png all mean the asset at /images/a.png
+    if path.startswith('/') and not os.path.exists(path):
+        return path
+    normalized = os.path.normpath(path)
+    static_root = os.path.normpath(static_root)
+    if normalized.startswith(static_root + os.sep):
+        normalized = os.path.relpath(normalized, static_root)
+    return '/' + normalized.replace(os.sep, '/')
+
+
+def dependents(manifest:BuildManifest, path:str, template_path:str, static_root:str) -> List[str]:
+    # Every page (by source markdown) that has to be rebuilt when path changes
+    if os.path.normpath(path) == os.path.normpath(template_path):
+        return sorted(manifest.pages)
+
+    source = os.path.normpath(path)
+    if source in manifest.pages:
+        return [source]
+
+    url = asset_url(path, static_root)
+    if url in manifest.template_assets:
+        return sorted(manifest.pages)
+    return sorted(source for source, entry in manifest.pages.items() if url in entry.get('assets', {}))
+
+
+def graph(manifest:BuildManifest, template_path:str) -> dict:
+    return {
+        'template': {'path': os.path.normpath(template_path), 'assets': manifest.template_assets},
+        'pages': {
+            source: {'output': entry['output'], 'assets': sorted(entry.get('assets', {}))}
+            for source, entry in sorted(manifest.pages.items())
+        },
+    }
+
+
+def find_orphans(manifest:BuildManifest, html_root:str) -> List[str]:
+    # Files in the output that no page, no static file and no precompressed sibling accounts for
+    known = {os.path.normpath(entry['output']) for entry in manifest.pages.values()}
+    known.update(os.path.normpath(os.path.join(html_root, rel_path)) for rel_path in manifest.static + manifest.compressed)
+
+    orphans = []
+    for rel_path in list_files(html_root):
+        path = os.path.normpath(os.path.join(html_root, rel_path))
+        if path not in known:
+            orphans.append(path)
+    return orphans
@@ -0,0 +1,128 @@
+from __future__ import annotations
+from typing import Iterator, List, TextIO
+from array import array
+
+from .htmlnode import HTMLNode, LeafNode, ParentNode, leaf_html, serialize_props
+
+# The same document as a ParentNode / LeafNode tree, but as one flat list of events held in parallel arrays
+# A tree costs an object (plus a children list) per element, this costs a few array slots per event
+#   OPEN  tag props        -> <tag props>
+#   LEAF  tag value props  -> same as LeafNode(tag, value, props)
+#   CLOSE tag              -> </tag>
+# The events are already in document order, so writing it out is one loop - no recursion and no stack
+OPEN = 0
+LEAF = 1
+CLOSE = 2
+
+CHUNK_EVENTS = 1024  # events per chunk that iter_html hands out
+
+
+class FlatDocument():
+    __slots__ = ('kinds', 'tags', 'values', 'props', '_open')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.tags: List[str | None] = []
+        self.values: List[str | None] = []
+        self.props: List[dict[str, str] | None] = []
+        self._open: List[str] = []  # tags still waiting on their close, only used while building
+
+    def open(self, tag:str, props:dict[str, str] | None = None) -> None:
+        self.kinds.append(OPEN)
+        self.tags.append(tag)
+        self.values.append(None)
+        self.props.append(props)
+        self._open.append(tag)
+
+    def leaf(self, tag:str | None, value:str, props:dict[str, str] | None = None) -> None:
+        self.kinds.append(LEAF)
+        self.tags.append(tag)
+        self.values.append(value)
+        self.props.append(props)
+
+    def close(self) -> None:
+        if not self._open:
+            raise ValueError("Nothing open to close")
+        self.kinds.append(CLOSE)
+        self.tags.append(self._open.pop())
+        self.values.append(None)
+        self.props.append(None)
+
+    def iter_html(self, chunk_events:int = CHUNK_EVENTS) -> Iterator[str]:
+        if self._open:
+            raise ValueError(f"Unclosed tags: {', '.join(self._open)}")
+
+        parts: List[str] = []
+        append = parts.append
+        tags, values, props = self.tags, self.values, self.props
+        for idx, kind in enumerate(self.kinds):
+            tag = tags[idx]
+            if kind == LEAF:
+                append(leaf_html(tag, values[idx], serialize_props(tag, props[idx])))
+            elif kind == OPEN:
+                append(f'<{tag}{serialize_props(tag, props[idx])}>')
+            else:
+                append(f'</{tag}>')
+
+            if len(parts) >= chunk_events:
+                yield ''.join(parts)
+                parts.clear()
+        if parts:
+            yield ''.join(parts)
+
+    def to_html(self) -> str:
+        return ''.join(self.iter_html())
+
+    def write_html(self, stream:TextIO) -> None:
+        write = stream.write
+        for chunk in self.iter_html():
+            write(chunk)
+
+    # HTMLNode view of the same document (tests and anything that wants to walk a tree)
+    def to_node(self) -> HTMLNode:
+        roots: List[HTMLNode] = []
+        stack: List[tuple] = []  # (tag, props, children) of the parents still open
+        for idx, kind in enumerate(self.kinds):
+            if kind == OPEN:
+                stack.append((self.tags[idx], self.props[idx], []))
+                continue
+
+            if kind == LEAF:
+                node: HTMLNode = LeafNode(self.tags[idx], self.values[idx], self.props[idx])  # type: ignore[arg-type]
+            else:
+                tag, props, children = stack.pop()
+                node = ParentNode(tag, children, props)
+            (stack[-1][2] if stack else roots).append(node)
+
+        if stack or len(roots) != 1:
+            raise ValueError(f"Document doesn't have exactly one root element ({len(roots)} complete, {len(stack)} open)")
+        return roots[0]
+
+    @classmethod
+    def from_node(cls, node:HTMLNode) -> FlatDocument:
+        doc = cls()
+        # Walks the tree with its own stack, a None entry means "close the parent above it"
+        stack: List[HTMLNode | None] = [node]
+        while stack:
+            current = stack.pop()
+            if current is None:
+                doc.close()
+            elif current.children is None:
+                doc.leaf(current.tag, current.value, current.props)  # type: ignore[arg-type]
+            else:
+                doc.open(current.tag, current.props)  # type: ignore[arg-type]
+                stack.append(None)
+                stack.extend(reversed(list(current.children)))
+        return doc
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __eq__(self, other:object) -> bool:
+        if not isinstance(other, FlatDocument):
+            return NotImplemented
+        return (self.kinds == other.kinds and self.tags == other.tags and
+                self.values == other.values and self.props == other.props)
+
+    def __repr__(self) -> str:
+        return f"FlatDocument(events: {len(self.kinds)}, open: {len(self._open)})"
@@ -1,26 +1,30 @@
 from __future__ import annotations
-from typing import Sequence, Dict, Callable
+from typing import Sequence, Dict, Callable, Iterable, Iterator, TextIO
 from .textnode import TextNode, TextType
+from .render_context import RenderContext
 LEAF_TAGS = ["p", "b", "i", "a", "img", "code", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6", "li", "span"]
 
-LeafBuilder = Callable[[TextNode], "LeafNode"]
+LeafBuilder = Callable[[TextNode, RenderContext | None], "LeafNode"]
 
 # Leaf Node Helpers
-def text_leaf(n:TextNode) -> LeafNode:
+# Every builder takes the render context, only the ones with urls care about it
+def text_leaf(n:TextNode, context:RenderContext | None = None) -> LeafNode:
     return LeafNode(None, n.text.replace('\n'," ")) # Strip newlines in paragraphs
 
-def simple_leaf(n:TextNode) -> LeafNode:
+def simple_leaf(n:TextNode, context:RenderContext | None = None) -> LeafNode:
     return LeafNode(n.text_type.value, n.text)
 
-def image_leaf(n:TextNode) -> LeafNode:
+def image_leaf(n:TextNode, context:RenderContext | None = None) -> LeafNode:
     if n.url is None:
         raise ValueError("Image must contain a URL")
-    return LeafNode(TextType.IMAGE.value, "",  {'src':n.url, 'alt':n.text})
+    url = n.url if context is None else context.url(n.url)
+    return LeafNode(TextType.IMAGE.value, "",  {'src':url, 'alt':n.text})
 
-def link_leaf(n:TextNode) -> LeafNode:
+def link_leaf(n:TextNode, context:RenderContext | None = None) -> LeafNode:
     if n.url is None:
         raise ValueError("Link Must contain a URL")
-    return LeafNode(TextType.LINK.value, n.text, {'href':n.url})
+    url = n.url if context is None else context.url(n.url)
+    return LeafNode(TextType.LINK.value, n.text, {'href':url})
 
 # Mapping for Leaf Node Functions 
 LEAF_BUILDER: Dict[TextType, LeafBuilder] = {
@@ -33,7 +37,49 @@ LEAF_BUILDER: Dict[TextType, LeafBuilder] = {
 }
 
 
+# Attributes that go first (in this order) for a tag, everything else follows alphabetically
+# Ordering stops at the first one that's missing, so an img without a src is just alphabetical
+PROP_ORDER: Dict[str, tuple] = {
+    'img': ('src', 'alt'),
+    'a': ('href',),
+}
+
+
+def serialize_props(tag:str | None, props:dict[str,str] | None) -> str:
+    if not props:
+        return ''
+
+    leading = []
+    for prop in PROP_ORDER.get(tag, ()):  # type: ignore[arg-type]
+        if prop not in props:
+            break
+        leading.append(prop)
+
+    ordered = leading + sorted(prop for prop in props if prop not in leading)
+    return ' ' + ' '.join([f'{prop}="{props[prop]}"' for prop in ordered])
+
+
+def leaf_html(tag:str | None, value:str | None, props_html:str = '') -> str:
+    # What a leaf renders to, shared with the flat document form (flatdoc.py)
+    if value is None:
+        raise ValueError("Leaf Node MUST contain a value")
+
+    if tag is None:
+        return value
+
+    if tag not in LEAF_TAGS:
+        raise TypeError("Invalid Leaf Tag")
+
+    if tag == 'img':
+        return f'<{tag}{props_html} />'
+    return f'<{tag}{props_html}>{value}</{tag}>'
+
+
 class HTMLNode():
+    # No per-instance __dict__, big pages make hundreds of thousands of these
+    # _props_html caches the serialized attributes, setting props clears it (mutating the dict in place won't)
+    __slots__ = ('tag', 'value', 'children', '_props', '_props_html')
+
     def __init__(
             self, tag:str | None = None, 
             value:str | None = None, 
@@ -42,42 +88,37 @@ class HTMLNode():
         
         self.tag = tag
         self.value = value
-        self.children = None if children is None else list(children)
-        self.props = props
+        # Lists get adopted as-is (the converter always hands over a fresh one), anything else gets copied
+        self.children = children if children is None or type(children) is list else list(children)
+        self._props = props
+        self._props_html: str | None = None
+
+    @property
+    def props(self) -> dict[str,str] | None:
+        return self._props
+
+    @props.setter
+    def props(self, props:dict[str,str] | None) -> None:
+        self._props = props
+        self._props_html = None
 
     # Child Classes will override
     def to_html(self) -> str:
         raise NotImplemented
-    
-    def props_to_html(self) -> str:
-        
-        if not self.props or len(self.props) == 0:
-            return ''
-        
-        sorted_props = sorted(self.props)
-        if self.tag == 'img' and 'src' in sorted_props:
-            src_idx = sorted_props.index('src')
-            src_info = sorted_props[src_idx]
-            del sorted_props[src_idx]
-            sorted_props.insert(0,src_info)
-
-            if 'alt' in sorted_props:
-                alt_idx = sorted_props.index('alt')
-                alt_info = sorted_props[alt_idx]
-                del sorted_props[alt_idx]
-                sorted_props.insert(1,alt_info)
-
-        if self.tag == 'a' and 'href' in sorted_props:
-            href_idx = sorted_props.index('href')
-            href_info = sorted_props[href_idx]
-            del sorted_props[href_idx]
-            sorted_props.insert(0,href_info)
 
+    # Child Classes will override - yields the html in chunks instead of one big string
+    def iter_html(self) -> Iterator[str]:
+        raise NotImplementedError
 
-        parts = [f'{prop}="{self.props[prop]}"' for prop in sorted_props]
-
-
-        return ' ' + ' '.join(parts)
+    def write_html(self, stream:TextIO) -> None:
+        write = stream.write
+        for chunk in self.iter_html():
+            write(chunk)
+    
+    def props_to_html(self) -> str:
+        if self._props_html is None:
+            self._props_html = serialize_props(self.tag, self._props)
+        return self._props_html
 
     def __eq__(self, other:object) -> bool:
         if not isinstance(other,HTMLNode):
@@ -104,6 +145,8 @@ class HTMLNode():
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
             self, tag:str | None, 
             value:str , 
@@ -112,26 +155,18 @@ class LeafNode(HTMLNode):
         super().__init__(tag=tag, value=value, children=None, props=props)
 
     def to_html(self) -> str:
-        if self.value is None:
-            raise ValueError("Leaf Node MUST contain a value")
-        
-        if self.tag is None:
-            return self.value
-        
-        if self.tag not in LEAF_TAGS:
-            raise TypeError("Invalid Leaf Tag")
+        if self.tag is None or self.value is None:
+            return leaf_html(self.tag, self.value)
+        return leaf_html(self.tag, self.value, self.props_to_html())
 
-        props_string = self.props_to_html()
-
-        if self.tag == 'img':
-            rendered_html = f'<{self.tag}{props_string} />'
-        else:    
-            rendered_html = f'<{self.tag}{props_string}>{self.value}</{self.tag}>'
-        
-        return rendered_html
+    # A leaf is already as small as a chunk gets
+    def iter_html(self) -> Iterator[str]:
+        yield self.to_html()
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
             self, tag:str, 
             children:Sequence[HTMLNode], 
@@ -150,14 +185,55 @@ class ParentNode(HTMLNode):
 
 
     def to_html(self) -> str:
+        return ''.join(iter_tree_html(self))
+
+    def iter_html(self) -> Iterator[str]:
+        return iter_tree_html(self)
+
+
+def iter_tree_html(root:ParentNode) -> Iterator[str]:
+    # Walks the tree with its own stack instead of recursing, so nesting depth is only limited by memory
+    # and there's no function call (or generator) per level.  Each stack entry is a parent's children (as an
+    # iterator, so it picks up where it left off) and its close tag.  A run of leaves gets rendered in the
+    # inner loop without touching the stack.  Anything that isn't a ParentNode renders itself
+    yield f'<{root.tag}{root.props_to_html()}>'
+    stack = [(iter(root.children), f'</{root.tag}>')]  # type: ignore[arg-type]
+    while stack:
+        children, close = stack[-1]
+        for child in children:
+            if isinstance(child, ParentNode):
+                yield f'<{child.tag}{child.props_to_html()}>'
+                stack.append((iter(child.children), f'</{child.tag}>'))  # type: ignore[arg-type]
+                break
+            yield child.to_html()
+        else:
+            stack.pop()
+            yield close
+
+
+class StreamedParentNode(HTMLNode):
+    # A parent whose children come from an iterator and get rendered as they show up
+    # Nothing holds on to a child once it's written, which is the whole point, so it only renders once
+    __slots__ = ()
 
-        assert self.tag is not None
-        assert self.children is not None
+    def __init__(
+            self, tag:str, 
+            children:Iterable[HTMLNode], 
+            props:dict[str,str] | None= None):
+        
+        if tag is None:
+            raise ValueError("Parent Node MUST contain a Tag")
         
-        props_string = self.props_to_html()
+        super().__init__(tag=tag, value=None, children=None, props=props)
+        self.children = iter(children)  # type: ignore[assignment]
 
-        html_open = f'<{self.tag}{props_string}>'
-        html_close = f'</{self.tag}>'
-        parts = [child.to_html() for child in self.children]
+    def to_html(self) -> str:
+        return ''.join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        assert self.children is not None
 
-        return html_open + "".join(parts) + html_close
+        yield f'<{self.tag}{self.props_to_html()}>'
+        for child in self.children:
+            yield from child.iter_html()
+        yield f'</{self.tag}>'
@@ -1,83 +1,321 @@
-from .markdown_converter import markdown_to_html_node, extract_title
+from .markdown_converter import markdown_to_document, stream_markdown_html_node, extract_title
+from .markdown_converter import configure_inline_cache, inline_cache_info
+from .manifest import BuildManifest, hash_file, remove_output
+from .parallel import run_parallel, make_dirs, describe_failures, IO_WORKERS
+from .template import Template
+from .render_context import RenderContext
+from .static_sync import sync_tree, list_files, SYNC_MODES
+from .assets import build_asset_map, asset_urls, write_asset_manifest, ASSET_MANIFEST
+from .compress import compress_tree, resolve_formats
+from .depgraph import page_assets, dependents, graph, find_orphans
+from .pipeline import Pipeline, DEFAULT_IN_FLIGHT
+from .output import AtomicOutput, OutputResult, OutputStats, write_output
+from .flatdoc import FlatDocument
+from . import profiler
+from . import parse_cache
+from typing import Dict, List, Tuple
 
+import argparse
+import cProfile
+import json
 import os
-import sys
 import shutil
+import sys
+import time
 
 STATIC_ROOT = './static'
 HTML_ROOT = './docs'
 TEMPLATE_ROOT = './template'
 CONTENT_ROOT = './content'
+BUILD_ROOT = './.build'
+MANIFEST_PATH = os.path.join(BUILD_ROOT, 'manifest.json')
+STREAM_THRESHOLD = 8 << 20  # markdown bigger than this gets parsed block by block as it's written
 
 
-def clean_public():
-    prep_dest(HTML_ROOT)
-    copy_tree(STATIC_ROOT, HTML_ROOT)
-
 def prep_dest(dest):
     if os.path.exists(dest):
         shutil.rmtree(dest)
     os.mkdir(dest)
 
 
-def copy_tree(src, dest):
-    list_of_items = os.listdir(src)
-    
-    for item in list_of_items:
-        src_filename = os.path.join(src, item)    
-        dst_filename = os.path.join(dest, item)
-        if os.path.isfile(src_filename):
-            shutil.copy(src_filename, dst_filename)
+# With fingerprint every static file lands under a content hashed name and the url -> hashed url map comes back for the RenderContext
+def sync_static(manifest:BuildManifest, mode:str = 'copy', use_hash:bool = False, fingerprint:bool = False,
+                static_root:str = STATIC_ROOT, html_root:str = HTML_ROOT, workers:int = IO_WORKERS) -> Dict[str, str]:
+    assets = build_asset_map(static_root, list_files(static_root)) if fingerprint else None
+    previous = manifest.static
+    if assets is not None:
+        # Still wanted - leave it for write_asset_manifest, which only touches it when the map changed
+        previous = [rel_path for rel_path in previous if rel_path != ASSET_MANIFEST]
+    stats, synced = sync_tree(static_root, html_root, previous, mode, use_hash, assets, workers)
+    if assets is not None:
+        write_asset_manifest(html_root, assets)
+        # Tracked with the static files so it gets pruned if fingerprinting is turned off again
+        synced.append(ASSET_MANIFEST)
+    manifest.static = synced
+    print(f"Static files: {stats.copied} copied, {stats.skipped} unchanged, {stats.removed} removed ({stats.rate()})")
+    return {} if assets is None else asset_urls(assets)
 
-        else:
-            if not os.path.exists(dst_filename):
-                os.mkdir(dst_filename)
-            copy_tree(src_filename, dst_filename)
 
+# Same page as build_page but handed back as a string instead of written out
+def render_markdown(src_markdown:str, template:Template) -> str:
+    content = page_content(src_markdown, template.context)
+    converted_html = content if isinstance(content, str) else content.to_html()
+    page_title = extract_title(src_markdown)
+
+    return template.render({'Title': page_title, 'Content': converted_html})
 
-def generate_page(from_path, template_path, dest_path, base_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open (from_path, 'r') as src:
-        src_markdown = src.read()
+# With --parse-cache the rendered fragment comes off disk (or goes onto it), otherwise it's the document to stream
+# The urls in it depend on the context, so that's part of the cache key
+def page_content(src_markdown:str, context:RenderContext | None = None) -> str | FlatDocument:
+    cache = parse_cache.ACTIVE
+    if cache is None:
+        return markdown_to_document(src_markdown, context)
+
+    # Only the asset names this page uses go in the key (and get used), a new name for some other file is still a hit
+    if context is not None:
+        context = context.scoped(src_markdown)
+    key = cache.key(src_markdown, '' if context is None else context.key())
+    converted_html = cache.get(key)
+    if converted_html is None:
+        converted_html = markdown_to_document(src_markdown, context).to_html()
+        cache.put(key, converted_html)
+    return converted_html
 
-    with open (template_path, 'r') as template:
-        template_html = template.read()
+# Renders straight into the output file, the full page never exists as one string
+# The output only gets replaced if it came out different, see output.py
+def build_page(from_path, dest_path, template:Template) -> OutputResult:
+    if os.path.getsize(from_path) > STREAM_THRESHOLD:
+        return build_large_page(from_path, dest_path, template)
 
+    with profiler.stage('read'):
+        with open (from_path, 'r') as src:
+            src_markdown = src.read()
 
-    converted_html = (markdown_to_html_node(src_markdown)).to_html()
+    content = page_content(src_markdown, template.context)
     page_title = extract_title(src_markdown)
 
-    final_html = template_html.replace('{{ Title }}', page_title)
-    final_html = final_html.replace('{{ Content }}', converted_html)
-    final_html = final_html.replace('href="/', f'href="{base_path}')
-    final_html = final_html.replace('src="/', f'src="{base_path}')
+    if not os.path.exists(dest_path):
+        os.makedirs(dest_path, exist_ok=True)
+
+    dest_file = os.path.join(dest_path, 'index.html')
+    if profiler.ACTIVE is None:
+        with AtomicOutput(dest_file) as dest:
+            template.write(dest, {'Title': page_title, 'Content': content})  # type: ignore[arg-type]
+        assert dest.result is not None
+        return dest.result
+
+    # Streaming interleaves rendering, templating and writing, so profiled builds do them one at a time to time them
+    with profiler.stage('to_html'):
+        converted_html = content if isinstance(content, str) else content.to_html()
+    with profiler.stage('template'):
+        final_html = template.render({'Title': page_title, 'Content': converted_html})
+    with profiler.stage('write'):
+        return write_output(dest_file, final_html)
+
+# Same thing for huge markdown, but the file is never read in whole and only one block is parsed at a time
+# Two passes: the title has to be written before the content, so find it first
+def build_large_page(from_path, dest_path, template:Template) -> OutputResult:
+    with open (from_path, 'r') as src:
+        page_title = extract_title(src)
 
     if not os.path.exists(dest_path):
-        os.makedirs(dest_path)
+        os.makedirs(dest_path, exist_ok=True)
 
     dest_file = os.path.join(dest_path, 'index.html')
-    with open (dest_file, 'w', encoding='utf-8') as dest:
-        dest.write(final_html)
+    with open (from_path, 'r') as src, AtomicOutput(dest_file) as dest:
+        template.write(dest, {'Title': page_title, 'Content': stream_markdown_html_node(src, template.context)})  # type: ignore[arg-type]
+    assert dest.result is not None
+    return dest.result
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path): 
-    list_of_items = os.listdir(dir_path_content)
+# The three stages build_page gets split into for the async pipeline (--in-flight)
+# Huge pages skip the read and stream straight from disk to disk in the render stage, like build_large_page always does
+def pipeline_read(from_path, dest_path, template:Template) -> str | None:
+    if os.path.getsize(from_path) > STREAM_THRESHOLD:
+        return None
+    with open (from_path, 'r') as src:
+        return src.read()
 
-    for content in list_of_items:
+def pipeline_render(from_path, dest_path, template:Template, src_markdown:str | None) -> str | OutputResult:
+    if src_markdown is None:
+        return build_large_page(from_path, dest_path, template)
+    return render_markdown(src_markdown, template)
+
+def pipeline_write(from_path, dest_path, template:Template, rendered:str | OutputResult) -> OutputResult:
+    if isinstance(rendered, OutputResult):
+        return rendered
+    os.makedirs(dest_path, exist_ok=True)
+    return write_output(os.path.join(dest_path, 'index.html'), rendered)
+
+def profiled_build_page(from_path, dest_path, template:Template) -> OutputResult:
+    with profiler.page(from_path):
+        return build_page(from_path, dest_path, template)
+
+def generate_page(from_path, template_path, dest_path, base_path):
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    template = Template.load(template_path, RenderContext(base_path))
+    return build_page(from_path, dest_path, template)
+
+# Settings that live in module globals have to be handed to every worker process
+def worker_settings() -> tuple:
+    cache = parse_cache.ACTIVE
+    return (
+        inline_cache_info()['maxsize'],
+        None if cache is None else cache.root,
+        parse_cache.DEFAULT_MAX_BYTES if cache is None else cache.max_bytes,
+    )
+
+def configure_worker(inline_cache_size:int, parse_cache_root:str | None, parse_cache_bytes:int) -> None:
+    configure_inline_cache(inline_cache_size)
+    parse_cache.configure(parse_cache_root, parse_cache_bytes)
+
+# Walks the content tree and pairs every markdown file with the directory its index.html goes in
+def find_content_pages(dir_path_content, dest_dir_path) -> List[Tuple[str, str]]:
+    pages = []
+    for content in sorted(os.listdir(dir_path_content)):
         updated_src_path = os.path.join(dir_path_content, content)
         if os.path.isfile(updated_src_path):
-            generate_page(updated_src_path, template_path, dest_dir_path, base_path)
+            pages.append((updated_src_path, dest_dir_path))
         else:
             updated_dst_path = os.path.join(dest_dir_path, content)
-            generate_pages_recursive(updated_src_path, template_path, updated_dst_path, base_path)
+            pages.extend(find_content_pages(updated_src_path, updated_dst_path))
+    return pages
+
+# in_flight > 0 builds through the async read / render / write pipeline with at most that many pages in flight
+# io_workers is how many threads the pipeline reads and writes on
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, base_path, manifest:BuildManifest | None = None, jobs:int = 1,
+                             assets:Dict[str, str] | None = None, in_flight:int = 0, io_workers:int = IO_WORKERS) -> OutputStats:
+    pages = find_content_pages(dir_path_content, dest_dir_path)
+    # Compiled once per build, every page (and every worker) shares it
+    # Its hash covers the compiled segments, so a new name for something the template links makes every page stale
+    # New names for things a page links to are caught per page by the manifest (page_assets)
+    template = Template.load(template_path, RenderContext(base_path, assets))
+    template_hash = template.hash
+    current_assets = template.context.assets
+    skipped = 0
+    stats = OutputStats()
+    if manifest is not None:
+        manifest.template_assets = template.urls
+
+    # Figure out everything that needs rendering first, then hand the list to the pool
+    todo = []
+    for from_path, dest_path in pages:
+        source_hash = ''
+        if manifest is not None:
+            source_hash = hash_file(from_path)
+            if manifest.is_fresh(from_path, source_hash, template_hash, os.path.join(dest_path, 'index.html'), current_assets):
+                skipped += 1
+                continue
+        todo.append((from_path, dest_path, source_hash))
+
+    # Workers write their own page so only the file name and hash have to come back across the process boundary
+    work = [(from_path, dest_path, template) for from_path, dest_path, _ in todo]
+    start = time.perf_counter()
+    make_dirs(dest_path for _, dest_path, _ in todo)
+    page_builder = build_page
+    if profiler.ACTIVE is not None:
+        # Timings live in this process, and workers would skew them anyway
+        jobs = 1
+        in_flight = 0
+        page_builder = profiled_build_page
+    if in_flight > 0:
+        pipeline = Pipeline(pipeline_read, pipeline_render, pipeline_write, jobs, in_flight, io_workers, configure_worker, worker_settings())
+        results = pipeline.run(work)
+    else:
+        results = run_parallel(page_builder, work, jobs, configure_worker, worker_settings())
+    failures = []
+    for (from_path, dest_path, source_hash), (ok, result) in zip(todo, results):
+        if not ok:
+            failures.append((from_path, result))
+            continue
+
+        print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+        stats.add(result)
+        if manifest is not None:
+            manifest.record(from_path, source_hash, template_hash, result.path, result.hash, page_assets(from_path, current_assets))
+
+    # Pages the manifest let us skip didn't get their output touched either
+    stats.seconds = time.perf_counter() - start
+    stats.unchanged += skipped
+    if manifest is not None:
+        for removed in manifest.remove_stale([from_path for from_path, _ in pages], dest_dir_path):
+            print(f"Removed {removed} (source deleted)")
+            stats.removed += 1
+        print(f"Skipped {skipped} unchanged page(s)")
+    print(f"Output files: {stats.written} written, {stats.unchanged} unchanged, {stats.removed} removed ({stats.rate()})")
+
+    if failures:
+        # Save what did build so the next run only retries the broken pages
+        if manifest is not None:
+            manifest.save()
+        raise RuntimeError(describe_failures(failures))
+    return stats
+
+
+# Answers --dependents / --graph from the last build's manifest, nothing gets built
+def query_graph(manifest:BuildManifest, template_path:str, dependents_of:str | None, show_graph:bool) -> None:
+    if show_graph:
+        print(json.dumps(graph(manifest, template_path), indent=2))
+    if dependents_of is not None:
+        sources = dependents(manifest, dependents_of, template_path, STATIC_ROOT)
+        print(f"{len(sources)} page(s) rebuild if {dependents_of} changes:")
+        for source in sources:
+            print(f"  {source} -> {manifest.pages[source]['output']}")
 
+def prune_orphans(manifest:BuildManifest, html_root:str = HTML_ROOT) -> int:
+    removed = 0
+    for orphan in find_orphans(manifest, html_root):
+        if remove_output(orphan, html_root):
+            print(f"Removed {orphan} (orphaned)")
+            removed += 1
+    return removed
 
-def main():
+# After everything is written - only outputs whose mtime moved get compressed again
+# formats None (no --precompress) removes the siblings an earlier build made, they'd be serving old pages
+def precompress(manifest:BuildManifest, formats:List[str] | None, jobs:int = 1, html_root:str = HTML_ROOT) -> None:
+    if formats is None and not manifest.compressed:
+        return
+    stats, manifest.compressed = compress_tree(html_root, formats or [], jobs, manifest.compressed, manifest.static)
+    print(f"Precompressed files: {stats.written} written, {stats.unchanged} unchanged, {stats.removed} removed")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Builds the static site from the content directory")
+    parser.add_argument('base_path', nargs='?', default=None, help="Path the site is hosted under (e.g. /bootdev-static)")
+    parser.add_argument('--full', action='store_true', help="Ignore the build manifest and rebuild everything")
+    parser.add_argument('--static-mode', choices=SYNC_MODES, default='copy', help="How static files get into the output (hardlink/reflink fall back to copy when the filesystem can't)")
+    parser.add_argument('--hash-static', action='store_true', help="Compare static files by content hash instead of size and mtime")
+    parser.add_argument('--fingerprint-assets', action='store_true', help="Give static files content hashed names (and rewrite links to them) so they can be cached forever")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="Number of worker processes to render pages with (0 = one per core)")
+    # Takes an explicit N - an optional value would eat the base path in `--in-flight /base/`
+    parser.add_argument('--in-flight', type=int, default=0, metavar='N',
+                        help=f"Build through the async pipeline (reads, rendering and writes overlap) with at most N pages in flight ({DEFAULT_IN_FLIGHT} is a good start, 0 = off)")
+    parser.add_argument('--io-workers', type=int, default=IO_WORKERS, metavar='N', help="Threads that copy static files (and read / write pages with --in-flight)")
+    parser.add_argument('--inline-cache', type=int, default=0, metavar='N', help="Remember the parsed inline markup of the last N distinct blocks (0 = off)")
+    parser.add_argument('--parse-cache', metavar='DIR', default=None, help="Keep rendered html fragments in DIR, keyed by a hash of the markdown and the parser (safe to share between builds and machines)")
+    parser.add_argument('--parse-cache-size', type=int, default=parse_cache.DEFAULT_MAX_BYTES >> 20, metavar='MB', help="Size cap for --parse-cache, least recently used entries get evicted")
+    parser.add_argument('--precompress', nargs='?', const='all', default=None, metavar='FORMATS',
+                        help="Write .gz (and .br / .zst when brotli / zstd are installed) next to every text output, e.g. --precompress gz,br")
+    parser.add_argument('--prune-orphans', action='store_true', help="Delete files in the output that no page or static file accounts for")
+    parser.add_argument('--dependents', metavar='PATH', default=None, help="List the pages that rebuild when PATH (markdown, the template or a static file) changes, then exit")
+    parser.add_argument('--graph', action='store_true', help="Print the dependency graph from the last build as JSON, then exit")
+    parser.add_argument('--profile', metavar='FILE', default=None, help="Time every build stage per page, write the JSON to FILE and print the slowest pages (implies --jobs 1 and no --in-flight)")
+    parser.add_argument('--cprofile', metavar='FILE', default=None, help="Dump cProfile stats for the page build to FILE (implies --jobs 1 and no --in-flight)")
+    parser.add_argument('--watch', action='store_true', help="After building, keep watching content/static/template and rebuild what changes")
+    parser.add_argument('--poll-interval', type=float, default=0.1, help="Seconds between checks in --watch mode")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
 
     base_path = '/'
 
-    if len(sys.argv) > 1:
-        base_path = f'{sys.argv[1]}/'
-    print (base_path)
+    if args.base_path is not None:
+        base_path = f'{args.base_path}/'
+    # Queries print JSON / lists, keep their output clean
+    querying = args.dependents is not None or args.graph
+    if not querying:
+        print (base_path)
 
     if not os.path.exists((content_path := os.path.join(CONTENT_ROOT, 'index.md'))):
         raise FileNotFoundError(f"Missing File {content_path}")
@@ -85,10 +323,79 @@ def main():
     if not os.path.exists((template_path := os.path.join(TEMPLATE_ROOT, 'template.html'))):
         raise FileNotFoundError(f"Missing File {template_path}")
 
-    clean_public()
-    generate_pages_recursive(CONTENT_ROOT, template_path, HTML_ROOT, base_path)
+    # Before building anything, asking for brotli without brotli installed should fail fast
+    formats = None if args.precompress is None else resolve_formats(args.precompress)
+
+    if querying:
+        # No base path given means the graph from whatever the last build used
+        manifest = BuildManifest.load(MANIFEST_PATH, None if args.base_path is None else base_path)
+        if manifest.discarded_base_path is not None:
+            print(f"Warning: the last build was for base path {manifest.discarded_base_path}, not {base_path} - the graph is empty", file=sys.stderr)
+        query_graph(manifest, template_path, args.dependents, args.graph)
+        return
+
+    manifest = BuildManifest.load(MANIFEST_PATH, base_path)
+
+    # Without a manifest there's no telling which outputs belong to deleted pages or static files, so start clean
+    # (a fresh clone has docs/ but not .build/) - same as --full
+    if args.full or not manifest.pages:
+        manifest.pages = {}
+        manifest.static = []
+        manifest.compressed = []
+        prep_dest(HTML_ROOT)
+
+    assets = sync_static(manifest, args.static_mode, args.hash_static, args.fingerprint_assets, workers=args.io_workers)
+
+    configure_inline_cache(args.inline_cache)
+    parse_cache.configure(args.parse_cache, args.parse_cache_size << 20)
+    if args.profile is not None:
+        profiler.ACTIVE = profiler.BuildProfiler()
+
+    cprofile = None
+    jobs = args.jobs
+    in_flight = args.in_flight
+    if args.cprofile is not None:
+        # cProfile only sees this process, workers and pipeline threads would hide the build from it
+        cprofile = cProfile.Profile()
+        jobs = 1
+        in_flight = 0
+        cprofile.enable()
+
+    try:
+        generate_pages_recursive(CONTENT_ROOT, template_path, HTML_ROOT, base_path, manifest, jobs, assets, in_flight, args.io_workers)
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(args.cprofile)
+            print(f"cProfile stats written to {args.cprofile}")
+        if profiler.ACTIVE is not None:
+            with open(args.profile, 'w', encoding='utf-8') as dest:
+                json.dump(profiler.ACTIVE.report(), dest, indent=2)
+            print(profiler.ACTIVE.summary())
+            print(f"Profile written to {args.profile}")
+            profiler.ACTIVE = None
+        if parse_cache.ACTIVE is not None:
+            # Workers only recount every so often, one pass here puts the cache back under its cap
+            parse_cache.ACTIVE.evict()
+    precompress(manifest, formats, args.jobs)
+    if args.prune_orphans:
+        prune_orphans(manifest)
+    manifest.save()
 
+    if args.inline_cache > 0:
+        # Workers keep their own caches, so this only counts pages built in this process
+        info = inline_cache_info()
+        print(f"Inline cache: {info['hits']} hits, {info['misses']} misses, {info['size']}/{info['maxsize']} entries")
+    if parse_cache.ACTIVE is not None:
+        print(f"Parse cache: {parse_cache.ACTIVE.hits} hits, {parse_cache.ACTIVE.misses} misses (this process)")
 
+    if args.watch:
+        # watch.py builds on this module, so it can only be pulled in once we're loaded
+        from .watch import SiteWatcher
+        watcher = SiteWatcher(CONTENT_ROOT, STATIC_ROOT, template_path, HTML_ROOT, base_path, manifest, args.static_mode, args.jobs,
+                              args.fingerprint_assets, assets, formats)
+        watcher.run(args.poll_interval)
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from typing import Dict, List, Iterable
+
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 2
+HASH_CHUNK = 1 << 20  # 1 MB reads so big files don't get slurped
+
+
+def hash_bytes(data:bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path:str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as src:
+        while chunk := src.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remove_output(path:str, stop_dir:str) -> bool:
+    # Deletes the file then walks back up removing any directories we emptied (never past stop_dir)
+    if not os.path.exists(path):
+        return False
+    os.remove(path)
+
+    stop_dir = os.path.normpath(stop_dir)
+    parent = os.path.dirname(os.path.normpath(path))
+    while parent and parent != stop_dir and parent.startswith(stop_dir):
+        if os.listdir(parent):
+            break
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+    return True
+
+
+class BuildManifest():
+    # Keeps track of what was built last time so we only re-render pages that changed
+    # pages maps source markdown -> {source_hash, template_hash, output, output_hash, assets}
+    # assets is the page's slice of the dependency graph: root relative url (image or link) -> the url it resolved to
+    # (the fingerprinted name, or itself), see depgraph.py
+    def __init__(self, path:str, base_path:str):
+        self.path = path
+        self.base_path = base_path
+        # Set when load threw the pages away because they were built for this other base path
+        self.discarded_base_path: str | None = None
+        self.pages: Dict[str, dict] = {}
+        # Files synced from static/ last build, relative to the output root
+        self.static: List[str] = []
+        # Root relative urls the template itself points at - every page depends on those
+        self.template_assets: List[str] = []
+        # .gz / .br / .zst siblings --precompress wrote, relative to the output root - the only ones it may delete
+        self.compressed: List[str] = []
+
+    # base_path None takes whatever the last build used (for reading the graph without knowing it)
+    @classmethod
+    def load(cls, path:str, base_path:str | None) -> BuildManifest:
+        manifest = cls(path, base_path or '/')
+        if not os.path.exists(path):
+            return manifest
+
+        try:
+            with open(path, 'r', encoding='utf-8') as src:
+                data = json.load(src)
+        except (OSError, ValueError):
+            # Corrupt manifest just means a full rebuild
+            return manifest
+
+        if data.get('version') != MANIFEST_VERSION:
+            return manifest
+
+        # Static files don't care about the base path, so keep these either way for pruning
+        manifest.static = data.get('static', [])
+        manifest.compressed = data.get('compressed', [])
+
+        if base_path is None:
+            manifest.base_path = data.get('base_path', manifest.base_path)
+        elif data.get('base_path') != base_path:
+            # Different base path means every link in every page is different, start over
+            manifest.discarded_base_path = data.get('base_path')
+            return manifest
+
+        manifest.pages = data.get('pages', {})
+        manifest.template_assets = data.get('template_assets', [])
+        return manifest
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        data = {
+            'version': MANIFEST_VERSION,
+            'base_path': self.base_path,
+            'pages': self.pages,
+            'static': self.static,
+            'template_assets': self.template_assets,
+            'compressed': self.compressed,
+        }
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as dest:
+            json.dump(data, dest, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    # assets is the current url -> fingerprinted url map, a page is stale if anything it shows got a new name
+    def is_fresh(self, source:str, source_hash:str, template_hash:str, output:str, assets:Dict[str, str] | None = None) -> bool:
+        entry = self.pages.get(os.path.normpath(source))
+        if entry is None:
+            return False
+
+        if (entry['source_hash'] != source_hash or
+            entry['template_hash'] != template_hash or
+            entry['output'] != os.path.normpath(output)):
+            return False
+
+        if assets is not None:
+            for url, resolved in entry.get('assets', {}).items():
+                if assets.get(url, url) != resolved:
+                    return False
+
+        # Someone deleted or hand edited the output
+        if not os.path.exists(output):
+            return False
+        return hash_file(output) == entry['output_hash']
+
+    # output_hash saves re-reading the output when whoever wrote it already hashed it
+    def record(self, source:str, source_hash:str, template_hash:str, output:str, output_hash:str | None = None,
+               assets:Dict[str, str] | None = None) -> None:
+        self.pages[os.path.normpath(source)] = {
+            'source_hash': source_hash,
+            'template_hash': template_hash,
+            'output': os.path.normpath(output),
+            'output_hash': hash_file(output) if output_hash is None else output_hash,
+            'assets': assets or {},
+        }
+
+    def remove_stale(self, current_sources:Iterable[str], stop_dir:str) -> List[str]:
+        # Anything we built last time whose markdown is gone gets its output deleted
+        current = {os.path.normpath(source) for source in current_sources}
+        live_outputs = {entry['output'] for source, entry in self.pages.items() if source in current}
+
+        removed = []
+        for source in sorted(self.pages):
+            if source in current:
+                continue
+            output = self.pages.pop(source)['output']
+            if output not in live_outputs and remove_output(output, stop_dir):
+                removed.append(output)
+        return removed
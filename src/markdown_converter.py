@@ -1,20 +1,27 @@
 from .textnode import TextNode, TextType
-from .htmlnode import LeafNode, HTMLNode, ParentNode, LEAF_BUILDER
-from typing import List
+from .htmlnode import LeafNode, HTMLNode, ParentNode, StreamedParentNode, LEAF_BUILDER
+from .render_context import RenderContext
+from .flatdoc import FlatDocument
+from typing import List, Iterable, Callable, Dict, Tuple
+from functools import lru_cache
 # from .markdown_helpers import LEAF_BUILDER, SPLIT_BUILDER, PIPELINE
 from .markdown_helpers import *
+from . import profiler
 
 
 # LEAF_BUILDER is what does all the work here
-def text_node_to_html_node(node:TextNode) -> LeafNode:
+def text_node_to_html_node(node:TextNode, context:RenderContext | None = None) -> LeafNode:
     leaf_func = LEAF_BUILDER.get(node.text_type)
     if leaf_func is None:
         raise TypeError ("Invalid Text Type")
-    return leaf_func(node)
+    return leaf_func(node, context)
 
     
+# Flip to True to go back to the five pass PIPELINE (handy for diffing it against scan_inline)
+LEGACY_INLINE_PIPELINE = False
+
 # SPLIT_BUILDER is what does all the work here
-def text_to_text_blocks(text:str) -> List[TextNode]:
+def pipeline_text_to_text_blocks(text:str) -> List[TextNode]:
     node_list = [TextNode(text, TextType.TEXT)]
     for text_type in PIPELINE:
         delimiter_function = SPLIT_BUILDER[text_type]
@@ -22,47 +29,140 @@ def text_to_text_blocks(text:str) -> List[TextNode]:
 
     return node_list
 
+def text_to_text_blocks(text:str, legacy:bool | None = None) -> List[TextNode]:
+    if legacy is None:
+        legacy = LEGACY_INLINE_PIPELINE
+    if legacy:
+        return pipeline_text_to_text_blocks(text)
+    return scan_inline(text)
+
 # Consideration - We can build out a HTML_Builder Mapping similar to what we did with LeafBuilder, but I think it'll be two layers
 # I don't really want to flex my inner SML so lets leave it be for now
-def markdown_to_html_node(md:str) -> HTMLNode:
-    list_of_html_nodes = []
-    md_blocks = markdown_to_blocks(md)
+# md can be the whole document or its lines (e.g. an open file), which skips the copies markdown_to_blocks makes
+# context fixes up urls as the link / image nodes get built (None leaves them exactly as written)
+def markdown_to_html_node(md:str | Iterable[str], context:RenderContext | None = None) -> HTMLNode:
+    with profiler.stage('block_split'):
+        md_blocks = markdown_to_blocks(md) if isinstance(md, str) else iter_markdown_blocks(md)
+
+    list_of_html_nodes = [block_to_html_node(md_block, context) for md_block in md_blocks]
+    final_node = ParentNode('div', list_of_html_nodes, None)
+    return final_node    
 
+def block_to_html_node(md_block:str, context:RenderContext | None = None) -> HTMLNode:
+    with profiler.stage('block_type'):
+        md_block_type, lines, level = classify_block(md_block)
+        updated_block = trim_md_chars(md_block, md_block_type, lines, level)
 
-    for md_block in md_blocks:
-        md_block_type = block_to_block_type(md_block)
-        updated_block = trim_md_chars(md_block, md_block_type)
-
-        
-        # Kinda ugly - might be a better way to do this
-        if md_block_type != BlockType.CODE and md_block_type != BlockType.HEADER:
-            my_children = build_children(updated_block)
-            list_of_html_nodes.append(ParentNode(md_block_type.value, my_children, None))
-
-        elif md_block_type == BlockType.HEADER:
-            num_hashes = md_block.index(' ')
-            my_children = build_children(updated_block)
-            list_of_html_nodes.append(ParentNode(f'{md_block_type.value}{num_hashes}', my_children, None))
-         
-
-        else:  # Code
+    
+    # Kinda ugly - might be a better way to do this
+    if md_block_type != BlockType.CODE and md_block_type != BlockType.HEADER:
+        my_children = build_children(updated_block, md_block_type, context)
+        with profiler.stage('node_build'):
+            return ParentNode(md_block_type.value, my_children, None)
+
+    elif md_block_type == BlockType.HEADER:
+        my_children = build_children(updated_block, md_block_type, context)
+        with profiler.stage('node_build'):
+            return ParentNode(f'{md_block_type.value}{level}', my_children, None)
+     
+
+    else:  # Code
+        with profiler.stage('node_build'):
             txt_node = TextNode(updated_block, TextType.CODE)
             code_leaf = text_node_to_html_node(txt_node)
-            code_parent = ParentNode('pre', [code_leaf], None)
-            list_of_html_nodes.append(code_parent)
+            return ParentNode('pre', [code_leaf], None)
 
-    final_node = ParentNode('div', list_of_html_nodes, None)
-    return final_node    
+# Same document as markdown_to_html_node, but built straight into a FlatDocument - no node per element
+# Renders to the exact same html, to_node() gives the tree back when something needs one
+def markdown_to_document(md:str | Iterable[str], context:RenderContext | None = None) -> FlatDocument:
+    with profiler.stage('block_split'):
+        md_blocks = markdown_to_blocks(md) if isinstance(md, str) else iter_markdown_blocks(md)
 
-def build_children(md_block):
+    doc = FlatDocument()
+    doc.open('div')
+    for md_block in md_blocks:
+        block_to_events(md_block, doc, context)
+    doc.close()
+    return doc
+
+def block_to_events(md_block:str, doc:FlatDocument, context:RenderContext | None = None) -> None:
+    with profiler.stage('block_type'):
+        md_block_type, lines, level = classify_block(md_block)
+        updated_block = trim_md_chars(md_block, md_block_type, lines, level)
+
+    if md_block_type == BlockType.CODE:
+        with profiler.stage('node_build'):
+            doc.open('pre')
+            doc.leaf(TextType.CODE.value, updated_block)
+            doc.close()
+        return
+
+    tag = md_block_type.value
+    if md_block_type == BlockType.HEADER:
+        tag = f'{tag}{level}'
+
+    if INLINE_CACHE is not None:
+        specs = INLINE_CACHE(updated_block, md_block_type, None if context is None else context.scoped(updated_block))
+        with profiler.stage('node_build'):
+            doc.open(tag)
+            for leaf_tag, value, props in specs:
+                doc.leaf(leaf_tag, value, None if props is None else dict(props))
+            doc.close()
+        return
+
+    leaves = parse_children(updated_block, context)
+    with profiler.stage('node_build'):
+        doc.open(tag)
+        for leaf in leaves:
+            doc.leaf(leaf.tag, leaf.value, leaf.props)  # type: ignore[arg-type]
+        doc.close()
+
+# For huge documents - takes lines (an open file works) and gives back a node that parses each
+# block as it gets rendered, so only one block is ever in memory.  Can only be rendered once
+def stream_markdown_html_node(lines:Iterable[str], context:RenderContext | None = None) -> HTMLNode:
+    block_nodes = (block_to_html_node(md_block, context) for md_block in iter_markdown_blocks(lines))
+    return StreamedParentNode('div', block_nodes, None)
+
+def build_children(md_block, block_type:BlockType | None = None, context:RenderContext | None = None):
+    if INLINE_CACHE is not None:
+        # Fresh nodes every time - the cache only holds plain tuples, so nobody can mutate what's cached
+        # Keyed on the asset names this block uses, not the whole map - a changed image elsewhere keeps the hits coming
+        scoped = None if context is None else context.scoped(md_block)
+        return [LeafNode(tag, value, None if props is None else dict(props)) for tag, value, props in INLINE_CACHE(md_block, block_type, scoped)]
+    return parse_children(md_block, context)
+
+def parse_children(md_block, context:RenderContext | None = None):
     html_children = []
-    list_of_txt_blocks = text_to_text_blocks(md_block)
+    with profiler.stage('inline_split'):
+        list_of_txt_blocks = text_to_text_blocks(md_block)
 
-    for block in list_of_txt_blocks:
-        html_children.append(text_node_to_html_node(block))
+    with profiler.stage('node_build'):
+        for block in list_of_txt_blocks:
+            html_children.append(text_node_to_html_node(block, context))
 
     return html_children
 
 
-
-    
\ No newline at end of file
+# Optional LRU cache in front of build_children (and so text_to_text_blocks), keyed by block text, type and render context
+# The same disclaimers / bios / license notes show up on thousands of pages, no point parsing them every time
+# It holds (tag, value, props items) tuples and build_children turns them back into new LeafNodes
+LeafSpec = Tuple[str | None, str, Tuple[Tuple[str, str], ...] | None]
+INLINE_CACHE: Callable[[str, BlockType | None, RenderContext | None], Tuple[LeafSpec, ...]] | None = None
+
+def build_leaf_specs(md_block:str, block_type:BlockType | None, context:RenderContext | None) -> Tuple[LeafSpec, ...]:
+    specs = []
+    for leaf in parse_children(md_block, context):
+        props = None if leaf.props is None else tuple(leaf.props.items())
+        specs.append((leaf.tag, leaf.value, props))
+    return tuple(specs)
+
+def configure_inline_cache(maxsize:int) -> None:
+    # 0 turns it off, anything else is the most blocks to remember
+    global INLINE_CACHE
+    INLINE_CACHE = None if maxsize <= 0 else lru_cache(maxsize=maxsize)(build_leaf_specs)
+
+def inline_cache_info() -> Dict[str, int]:
+    if INLINE_CACHE is None:
+        return {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 0}
+    info = INLINE_CACHE.cache_info()  # type: ignore[attr-defined]
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'maxsize': info.maxsize}
@@ -1,14 +1,10 @@
 from .textnode import TextNode, TextType
-from typing import Tuple,List, Dict, Callable
+from typing import Tuple,List, Dict, Callable, Iterable, Iterator
 from enum import Enum
 
 import re
 
 
-IMG_ADJUST = 2  # for '!' and '['
-LINK_ADJUST = 1 # for '['
-IDX_ADJUST = 3 # for ']' '('  and ')'
-
 # Just so I don't have to retype it a bunch of times
 PIPELINE = [TextType.BOLD, TextType.ITALIC, TextType.CODE, TextType.IMAGE, TextType.LINK]
 
@@ -26,12 +22,21 @@ class BlockType (Enum):
     ORDERED_LIST = 'ol'
 
 
-# RegEx Helpers
+# RegEx Helpers - compiled once, everything below shares them
+IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_RE = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def extract_markdown_images(text:str) -> List[Tuple[str,str]]:
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return IMAGE_RE.findall(text)
     
 def extract_markdown_links(text:str) -> List[Tuple[str,str]]:
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return LINK_RE.findall(text)
+
+# Mapping for the compiled patterns (the splitters want match spans, not just the text)
+PATTERN: Dict[TextType, re.Pattern] = {
+    TextType.IMAGE: IMAGE_RE,
+    TextType.LINK: LINK_RE,
+}
 
 # Mapping for RegEx Functions
 EXTRACTOR: Dict[TextType,Extractor] = {
@@ -40,8 +45,9 @@ EXTRACTOR: Dict[TextType,Extractor] = {
 
 }
 
-def extract_title(markdown):
-    lines = markdown.split('\n')
+# Takes the markdown as a string, or as lines (an open file works) so big files don't need to be read in
+def extract_title(markdown:str | Iterable[str]):
+    lines = markdown.split('\n') if isinstance(markdown, str) else markdown
     for line in lines:
         new_line = line.strip()
         if new_line.startswith('# '):
@@ -80,9 +86,11 @@ def make_delimiter_splitter(delimter:str, text_type:TextType) -> Callable[[List[
         return new_nodes
     return split_nodes_delimiter
     
-def make_img_link_splitter(text_type:TextType, adjuster:int) -> Callable[[List[TextNode]], List[TextNode]]:
+def make_img_link_splitter(text_type:TextType) -> Callable[[List[TextNode]], List[TextNode]]:
     if not (text_type is TextType.LINK or text_type is TextType.IMAGE):
         raise ValueError("Improper Usage")
+
+    pattern = PATTERN[text_type]
     
     def split_nodes_img_link_helper(old_nodes:List[TextNode]) -> List[TextNode]:
         new_nodes = []
@@ -92,45 +100,19 @@ def make_img_link_splitter(text_type:TextType, adjuster:int) -> Callable[[List[T
                 new_nodes.append(node_to_split)
                 continue
 
-
-            # helper is defined above, its slightly different based on whether its a link or image
-            list_of_items = EXTRACTOR[text_type](node_to_split.text)
+            # The match spans say exactly where each image / link sits, so the text only gets scanned once
             node_text = node_to_split.text
             current_index = 0
 
-            for item in list_of_items:
-                
-                # This shouldn't ever happen, I can't get a test case to make it happen, but just in case
-                if current_index >= len(node_text):
-                    raise ValueError("Malfromed Text")
-
-                first_txt = item[0]
-                second_txt = item[1]
-
-                # To account for the markdown characters
-
-                temp_current_index = current_index
-                while (True):
-                    start_index = node_text.find(first_txt, temp_current_index)
-                    if start_index == -1:
-                        raise ValueError("Malformed Text")
-
-                    if start_index > 0 and node_text[start_index-1] == '[':
-                        start_index = start_index - adjuster
-                        break
-                    temp_current_index += max(len(first_txt),1)
-
+            for found in pattern.finditer(node_text):
                 # This is actually the default case - when things are at the start or back to back this does not trigger (no empty texts)
-                if current_index != start_index:
-                    prefix_text = node_text[current_index:start_index]
-                    prefix_node = TextNode(prefix_text,TextType.TEXT)
-                    new_nodes.append(prefix_node)
+                if current_index != found.start():
+                    new_nodes.append(TextNode(node_text[current_index:found.start()], TextType.TEXT))
 
-                new_node = TextNode(first_txt,text_type,second_txt)
-                new_nodes.append(new_node)
+                new_nodes.append(TextNode(found.group(1), text_type, found.group(2)))
 
                 # Update our current position
-                current_index = (start_index + len(first_txt) + len(second_txt) + (adjuster+IDX_ADJUST))
+                current_index = found.end()
 
             # Handles trailing text with no more links / images
             if current_index < len(node_text):
@@ -144,112 +126,156 @@ SPLIT_BUILDER: Dict[TextType, SplitBuilder] = {
     TextType.BOLD: make_delimiter_splitter('**', TextType.BOLD),
     TextType.ITALIC: make_delimiter_splitter('_', TextType.ITALIC),
     TextType.CODE: make_delimiter_splitter('`', TextType.CODE),
-    TextType.IMAGE: make_img_link_splitter(TextType.IMAGE, IMG_ADJUST),
-    TextType.LINK: make_img_link_splitter(TextType.LINK, LINK_ADJUST)
+    TextType.IMAGE: make_img_link_splitter(TextType.IMAGE),
+    TextType.LINK: make_img_link_splitter(TextType.LINK)
 
 }
 
+# Single pass inline scanner
+# Walks the text once jumping from one possible markup character to the next, instead of running every
+# SPLIT_BUILDER stage over the whole thing.  Produces the same TextNodes as PIPELINE for well formed text
+INLINE_TOKEN_RE = re.compile(r"\*\*|_|`|!\[|\[")
+INLINE_DELIMITERS: Dict[str, TextType] = {
+    '**': TextType.BOLD,
+    '_': TextType.ITALIC,
+    '`': TextType.CODE,
+}
+
+def scan_inline(text:str) -> List[TextNode]:
+    new_nodes = []
+    text_start = 0  # where the plain text we haven't emitted yet starts
+    search_from = 0
+
+    while (token_match := INLINE_TOKEN_RE.search(text, search_from)) is not None:
+        token = token_match.group(0)
+        token_start = token_match.start()
+
+        delimited_type = INLINE_DELIMITERS.get(token)
+        if delimited_type is not None:
+            close_index = text.find(token, token_match.end())
+            # malformed inline (no matching end)
+            if close_index == -1:
+                raise ValueError("Malformed")
+
+            if token_start > text_start:
+                new_nodes.append(TextNode(text[text_start:token_start], TextType.TEXT))
+            if close_index > token_match.end():
+                new_nodes.append(TextNode(text[token_match.end():close_index], delimited_type))
+            text_start = search_from = close_index + len(token)
+            continue
+
+        if token == '![':
+            pattern, text_type = IMAGE_RE, TextType.IMAGE
+        else:
+            pattern, text_type = LINK_RE, TextType.LINK
+
+        found = pattern.match(text, token_start)
+        # Just a bracket, it stays part of the text
+        if found is None:
+            search_from = token_start + 1
+            continue
+
+        if token_start > text_start:
+            new_nodes.append(TextNode(text[text_start:token_start], TextType.TEXT))
+        new_nodes.append(TextNode(found.group(1), text_type, found.group(2)))
+        text_start = search_from = found.end()
+
+    # Handles trailing text with no more markup
+    if text_start < len(text):
+        new_nodes.append(TextNode(text[text_start:], TextType.TEXT))
+
+    return new_nodes
+
 def markdown_to_blocks(markdown:str) -> List[str]:
     markdown = markdown.replace('\r',"")
     blocks = markdown.split('\n\n')
     new_blocks = [stripped_block for block in blocks if (stripped_block := block.strip()) != '']
     return new_blocks
 
-def markdown_header_validator(markdown):
-    if len(markdown) < 2:
-        raise ValueError("Malformed Header Block") 
-    current_char = 0
-    
-    while markdown[current_char] == '#':
-        current_char += 1
-    if current_char > 6 or markdown[current_char] != ' ':
-        raise ValueError("Malformed Header Block")
-    return BlockType.HEADER
-
-def markdown_code_validator(markdown):
-    if not markdown.endswith('```'):
-        raise ValueError("Malformed Code Block") 
-    return BlockType.CODE
-
-def markdown_quote_validator(markdown):
-    lines = markdown.split('\n')
-    for line in lines:
-        if not line.startswith('>'):
-            raise ValueError("Malformed Quote Block")
-    return BlockType.QUOTE
-
-def markdown_unordered_list_validator(markdown):
-    lines = markdown.split('\n')
+# Line at a time version of markdown_to_blocks for files too big to read in one go
+# A blank line ends a block, same as splitting on '\n\n' - blocks come out one at a time as they finish
+def iter_markdown_blocks(lines:Iterable[str]) -> Iterator[str]:
+    current: List[str] = []
     for line in lines:
-        if not line.startswith('- '):
-            raise ValueError("Malformed Unordered List Block")
-    return BlockType.UNORDERED_LIST
-
-def markdown_ordered_list_validator(markdown):
-    previous_digit = 0
-    lines = markdown.split('\n')
-    for line in lines:
-        if len(line) <= 2 or not line[0].isdigit() or not line[1] == '.' or not line[2] == ' ':
-            raise ValueError("Malformed Ordered List Block")
-        current_digit = int(line[0])
-        if previous_digit + 1 != current_digit:
-            raise ValueError("Malformed Ordered List Block")
-        previous_digit = current_digit
-    return BlockType.ORDERED_LIST
-
-
-Validator = Callable[[str], BlockType]
-VALIDATOR:Dict[BlockType,Validator] = {
-    BlockType.HEADER: markdown_header_validator,
-    BlockType.QUOTE: markdown_quote_validator,
-    BlockType.CODE: markdown_code_validator,
-    BlockType.UNORDERED_LIST: markdown_unordered_list_validator,
-    BlockType.ORDERED_LIST: markdown_ordered_list_validator,
-    BlockType.PARAGRAPH: lambda _: BlockType.PARAGRAPH,
-
-}
-
-def block_to_block_type(markdown:str) -> BlockType:
+        line = line.replace('\r', '').rstrip('\n')
+        if line:
+            current.append(line)
+            continue
+
+        if current:
+            if (stripped_block := '\n'.join(current).strip()) != '':
+                yield stripped_block
+            current = []
+
+    if current and (stripped_block := '\n'.join(current).strip()) != '':
+        yield stripped_block
+
+# One pass over a block: its type, its lines (lists only, that's the one place they get used) and the header level
+# Same rules the old per type validators had (test_md_blocks keeps them to check against), but nothing downstream
+# has to split the block or count the hashes again
+# lines is None and level is 0 when they don't apply
+ClassifiedBlock = Tuple[BlockType, List[str] | None, int]
+
+def classify_block(markdown:str) -> ClassifiedBlock:
     if not markdown: raise ValueError("Empty Block")
     first_markdown_char = markdown[0]
     match first_markdown_char:
         case '#':
-            validator = VALIDATOR[BlockType.HEADER]
+            level = len(markdown) - len(markdown.lstrip('#'))
+            if level > 6 or level >= len(markdown) or markdown[level] != ' ':
+                raise ValueError("Malformed Header Block")
+            return BlockType.HEADER, None, level
         case '>':
-            validator = VALIDATOR[BlockType.QUOTE]
-        case '-': 
-            validator = VALIDATOR[BlockType.UNORDERED_LIST]
+            # Every line starts with '>' <=> every newline is followed by one
+            if markdown.count('\n') != markdown.count('\n>'):
+                raise ValueError("Malformed Quote Block")
+            return BlockType.QUOTE, None, 0
+        case '-':
+            lines = markdown.split('\n')
+            for line in lines:
+                if not line.startswith('- '):
+                    raise ValueError("Malformed Unordered List Block")
+            return BlockType.UNORDERED_LIST, lines, 0
         case _:
             if first_markdown_char.isdigit():
-                validator = VALIDATOR[BlockType.ORDERED_LIST]
-            elif markdown.startswith('```'):
-                validator = VALIDATOR[BlockType.CODE]
-            else:
-                validator = VALIDATOR[BlockType.PARAGRAPH]
-        
-    return validator(markdown)
+                lines = markdown.split('\n')
+                for number, line in enumerate(lines, 1):
+                    if len(line) <= 2 or line[1] != '.' or line[2] != ' ' or not line[0].isdigit() or int(line[0]) != number:
+                        raise ValueError("Malformed Ordered List Block")
+                return BlockType.ORDERED_LIST, lines, 0
+            if markdown.startswith('```'):
+                if not markdown.endswith('```'):
+                    raise ValueError("Malformed Code Block")
+                return BlockType.CODE, None, 0
+            return BlockType.PARAGRAPH, None, 0
+
+def block_to_block_type(markdown:str) -> BlockType:
+    return classify_block(markdown)[0]
 
 
 
-def trim_md_chars(block: str, block_type):
+# lines / level are what classify_block hands back, without them the block gets split / scanned here
+def trim_md_chars(block: str, block_type, lines:List[str] | None = None, level:int = 0):
     updated_string = block
     if block_type == BlockType.QUOTE:   
         updated_string = updated_string.replace('\n> ', ' ')
         updated_string = updated_string.replace('> ', '')
     
     if block_type == BlockType.UNORDERED_LIST:
-        lines = updated_string.split('\n')
+        if lines is None:
+            lines = updated_string.split('\n')
         parts = [f'<li>{line[2:]}</li>' for line in lines]
         updated_string = "".join(parts)
 
     if block_type == BlockType.ORDERED_LIST:
         # print (repr(updated_string))
-        lines = updated_string.split('\n')
+        if lines is None:
+            lines = updated_string.split('\n')
         parts = [f'<li>{line[3:]}</li>' for line in lines]
         updated_string = "".join(parts)
 
     if block_type == BlockType.HEADER:
-        space_char = updated_string.index(' ')
+        space_char = level or updated_string.index(' ')
         updated_string = updated_string[space_char+1:]
 
     if block_type == BlockType.CODE:
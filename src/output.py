@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+
+from .manifest import hash_file
+from .parallel import format_rate
+
+WRITE_BUFFER = 1 << 16
+
+# mkstemp makes 0600 files, outputs get served so they should look like anything else we'd create
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+class OutputResult():
+    # What building one output file did - small enough to hand back from a worker process
+    __slots__ = ('path', 'hash', 'written', 'size')
+
+    def __init__(self, path:str, hash:str, written:bool, size:int = 0):
+        self.path = path
+        self.hash = hash
+        self.written = written
+        self.size = size
+
+    def __repr__(self) -> str:
+        return f"OutputResult(path: {self.path}, written: {self.written})"
+
+
+class OutputStats():
+    def __init__(self):
+        self.written = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.bytes = 0  # written, for the throughput
+        self.seconds = 0.0
+
+    def add(self, result:OutputResult) -> None:
+        if result.written:
+            self.written += 1
+            self.bytes += result.size
+        else:
+            self.unchanged += 1
+
+    def rate(self) -> str:
+        return format_rate(self.written, self.bytes, self.seconds)
+
+    def __repr__(self) -> str:
+        return f"OutputStats(written: {self.written}, unchanged: {self.unchanged}, removed: {self.removed})"
+
+
+class AtomicOutput():
+    # A text stream that goes to a temp file next to path, hashing what goes through it
+    # On a clean exit the temp file only replaces path when the bytes are different, so unchanged outputs keep
+    # their mtime (and rsync leaves them alone).  Readers see the old file or the new one, never half of one
+    def __init__(self, path:str, buffering:int = WRITE_BUFFER):
+        self.path = path
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.result: OutputResult | None = None
+        fd, self.temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp-')
+        os.chmod(self.temp_path, 0o666 & ~UMASK)
+        self.file = os.fdopen(fd, 'wb', buffering=buffering)
+
+    def write(self, text:str) -> int:
+        data = text.encode('utf-8')
+        self.digest.update(data)
+        self.size += len(data)
+        self.file.write(data)
+        return len(text)
+
+    def matches_existing(self, output_hash:str) -> bool:
+        try:
+            if os.path.getsize(self.path) != self.size:
+                return False
+        except FileNotFoundError:
+            return False
+        return hash_file(self.path) == output_hash
+
+    def commit(self) -> OutputResult:
+        self.file.close()
+        output_hash = self.digest.hexdigest()
+        written = not self.matches_existing(output_hash)
+        if written:
+            os.replace(self.temp_path, self.path)
+        else:
+            os.remove(self.temp_path)
+        self.result = OutputResult(self.path, output_hash, written, self.size)
+        return self.result
+
+    def discard(self) -> None:
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def __enter__(self) -> AtomicOutput:
+        return self
+
+    def __exit__(self, exc_type, *exc) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+
+def write_output(path:str, text:str) -> OutputResult:
+    with AtomicOutput(path) as dest:
+        dest.write(text)
+    assert dest.result is not None
+    return dest.result
@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple, Any
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import os
+
+# Each result is either whatever func returned or the exception it raised, so one bad page can't sink the build
+Result = Tuple[bool, Any]
+
+IO_WORKERS = 8  # threads for file copies / writes, enough to keep a network volume busy
+
+
+def resolve_jobs(jobs:int) -> int:
+    # 0 (or anything negative) means use every core we have
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def run_serial(func:Callable[..., Any], work:Sequence[tuple]) -> Iterator[Result]:
+    for args in work:
+        try:
+            yield True, func(*args)
+        except Exception as err:
+            yield False, err
+
+
+def run_parallel(func:Callable[..., Any], work:Sequence[tuple], jobs:int,
+                 initializer:Callable[..., Any] | None = None, initargs:tuple = ()) -> Iterator[Result]:
+    # Results come back in the same order as work so the output (and the log) is deterministic
+    # initializer runs once in every worker, for settings that live in module globals
+    jobs = resolve_jobs(jobs)
+    if jobs == 1 or len(work) <= 1:
+        yield from run_serial(func, work)
+        return
+
+    try:
+        executor = ProcessPoolExecutor(max_workers=min(jobs, len(work)), initializer=initializer, initargs=initargs)
+    except (OSError, NotImplementedError, PermissionError) as err:
+        print(f"Process pool unavailable ({err}), falling back to serial build")
+        yield from run_serial(func, work)
+        return
+
+    with executor:
+        futures = [executor.submit(func, *args) for args in work]
+        for idx, future in enumerate(futures):
+            try:
+                yield True, future.result()
+            except BrokenProcessPool:
+                # A worker died hard (OOM killer etc), finish whatever is left in this process
+                print("Process pool broke, finishing the remaining pages serially")
+                for future_left in futures[idx:]:
+                    future_left.cancel()
+                yield from run_serial(func, work[idx:])
+                return
+            except Exception as err:
+                yield False, err
+
+
+def run_threaded(func:Callable[..., Any], work:Sequence[tuple], workers:int = IO_WORKERS) -> List[Result]:
+    # run_parallel for I/O - threads are plenty when the time goes to waiting on the disk, and nothing has to be pickled
+    if workers <= 1 or len(work) <= 1:
+        return list(run_serial(func, work))
+
+    def call(args:tuple) -> Result:
+        try:
+            return True, func(*args)
+        except Exception as err:
+            return False, err
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(work))) as executor:
+        return list(executor.map(call, work))
+
+
+def make_dirs(paths:Iterable[str]) -> None:
+    # Every directory up front, so the workers never race each other creating the same one
+    for directory in sorted(set(paths)):
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+
+def format_rate(files:int, size:int, seconds:float) -> str:
+    if seconds <= 0:
+        return f"{files} file(s), {size / (1 << 20):.1f} MB"
+    return f"{files / seconds:.0f} files/s, {size / (1 << 20) / seconds:.1f} MB/s"
+
+
+def describe_failures(failures:List[Tuple[str, BaseException]]) -> str:
+    lines = [f"{len(failures)} page(s) failed to build:"]
+    lines.extend(f"  {path}: {type(err).__name__}: {err}" for path, err in failures)
+    return '\n'.join(lines)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+from typing import List, Tuple
+
+import hashlib
+import os
+import tempfile
+
+# Bump this when the html for the same markdown changes in a way the source fingerprint can't see
+PARSER_VERSION = '1'
+
+# Anything in these files can change the html, so they're part of every key
+PARSER_SOURCES = ('markdown_converter.py', 'markdown_helpers.py', 'htmlnode.py', 'textnode.py', 'flatdoc.py', 'render_context.py')
+
+DEFAULT_MAX_BYTES = 512 << 20
+EVICT_TO = 0.9  # evict down to 90% of the cap so we aren't evicting on every single put
+CHECK_EVERY = 0.05  # recount what's on disk after writing this fraction of the cap
+
+# Set by --parse-cache, None means no caching
+ACTIVE: ParseCache | None = None
+
+
+def parser_fingerprint() -> str:
+    digest = hashlib.sha256(PARSER_VERSION.encode('utf-8'))
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in PARSER_SOURCES:
+        with open(os.path.join(src_dir, name), 'rb') as src:
+            digest.update(src.read())
+    return digest.hexdigest()
+
+
+class ParseCache():
+    # Content addressed cache of rendered html fragments: root/ab/cdef... where abcdef... = hash(parser + markdown)
+    # Safe to share between processes (and machines on a shared volume): entries are written to a temp file
+    # and os.replace'd into place, and eviction shrugs off files someone else already removed
+    # Recency is the file mtime, get() bumps it, eviction removes the oldest first
+    def __init__(self, root:str, max_bytes:int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.fingerprint = parser_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+        # Every worker process has its own ParseCache writing into the same directory, so no process can keep a
+        # running total - each one recounts what's on disk after every CHECK_EVERY of the cap it writes
+        # That keeps the overshoot to about workers * CHECK_EVERY of the cap, and the build evicts once at the end
+        # Nothing gets walked here, starting a worker is free
+        self.check_bytes = max(1, int(max_bytes * CHECK_EVERY))
+        self.unchecked_bytes = 0
+
+    def key(self, markdown:str, extra:str = '') -> str:
+        digest = hashlib.sha256(self.fingerprint.encode('utf-8'))
+        digest.update(b'\0' + extra.encode('utf-8') + b'\0')
+        digest.update(markdown.encode('utf-8'))
+        return digest.hexdigest()
+
+    def path_for(self, key:str) -> str:
+        return os.path.join(self.root, key[:2], key[2:])
+
+    def get(self, key:str) -> str | None:
+        path = self.path_for(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as src:
+                html = src.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted by someone else while we were reading, we still have the html
+        self.hits += 1
+        return html
+
+    def put(self, key:str, html:str) -> None:
+        path = self.path_for(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        data = html.encode('utf-8')
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as dest:
+                dest.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        self.unchecked_bytes += len(data)
+        if self.unchecked_bytes >= self.check_bytes:
+            self.evict()
+
+    def entries(self) -> List[Tuple[str, int, int]]:
+        # (path, size, mtime) for everything in the cache, temp files from in-flight writes are left alone
+        found = []
+        for dir_path, _, file_names in os.walk(self.root):
+            for name in file_names:
+                if name.startswith('.tmp-'):
+                    continue
+                path = os.path.join(dir_path, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                found.append((path, stat.st_size, stat.st_mtime_ns))
+        return found
+
+    def evict(self) -> int:
+        # Counts what's actually on disk (everyone's writes) and only evicts if that's over the cap
+        self.unchecked_bytes = 0
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        target = int(self.max_bytes * EVICT_TO)
+        removed = 0
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # another build got there first
+            total -= size
+        return removed
+
+
+def configure(root:str | None, max_bytes:int = DEFAULT_MAX_BYTES) -> None:
+    global ACTIVE
+    ACTIVE = None if root is None else ParseCache(root, max_bytes)
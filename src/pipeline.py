@@ -0,0 +1,111 @@
+from __future__ import annotations
+from typing import Any, Callable, List, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import asyncio
+
+from .parallel import Result, resolve_jobs, IO_WORKERS
+
+DEFAULT_IN_FLIGHT = 16
+
+# Three stages joined by bounded queues: read (threads) -> render (processes) -> write (threads)
+# While page N is rendering, N+1.. are being read and N-1.. written, so disk latency hides behind the cpu work
+# in_flight caps how many pages are anywhere between "started reading" and "finished writing", which is what
+# keeps memory flat no matter how big the site is
+# read(*item) -> data, render(*item, data) -> rendered, write(*item, rendered) -> result
+# render gets pickled over to the worker processes, so it (and the items) have to be picklable
+
+
+class Pipeline():
+    def __init__(self, read:Callable[..., Any], render:Callable[..., Any], write:Callable[..., Any],
+                 jobs:int = 1, in_flight:int = DEFAULT_IN_FLIGHT, io_workers:int = IO_WORKERS,
+                 initializer:Callable[..., Any] | None = None, initargs:tuple = ()):
+        self.read = read
+        self.render = render
+        self.write = write
+        self.jobs = resolve_jobs(jobs)
+        self.in_flight = max(1, in_flight)
+        self.io_workers = max(1, min(io_workers, self.in_flight))
+        self.initializer = initializer
+        self.initargs = initargs
+
+    def render_executor(self) -> Executor:
+        if self.jobs > 1:
+            try:
+                return ProcessPoolExecutor(max_workers=self.jobs, initializer=self.initializer, initargs=self.initargs)
+            except (OSError, NotImplementedError, PermissionError) as err:
+                print(f"Process pool unavailable ({err}), rendering on a thread instead")
+        # Same process - whatever the initializer sets is already set here
+        return ThreadPoolExecutor(max_workers=1)
+
+    def run(self, work:Sequence[tuple]) -> List[Result]:
+        if not work:
+            return []
+        return asyncio.run(self.run_async(work))
+
+    async def run_async(self, work:Sequence[tuple]) -> List[Result]:
+        loop = asyncio.get_running_loop()
+        results: List[Result] = [(False, None)] * len(work)
+        slots = asyncio.Semaphore(self.in_flight)
+        render_queue: asyncio.Queue = asyncio.Queue(maxsize=self.in_flight)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.in_flight)
+        pending = iter(range(len(work)))
+        render_workers = self.jobs
+        fallback = ThreadPoolExecutor(max_workers=1)
+
+        def fail(idx:int, err:BaseException) -> None:
+            results[idx] = (False, err)
+            slots.release()
+
+        async def reader() -> None:
+            for idx in pending:  # shared iterator, every reader takes the next page
+                await slots.acquire()
+                try:
+                    data = await loop.run_in_executor(io, self.read, *work[idx])
+                except Exception as err:
+                    fail(idx, err)
+                    continue
+                await render_queue.put((idx, data))
+
+        async def renderer() -> None:
+            nonlocal cpu
+            while (job := await render_queue.get()) is not None:
+                idx, data = job
+                try:
+                    try:
+                        rendered = await loop.run_in_executor(cpu, self.render, *work[idx], data)
+                    except BrokenProcessPool:
+                        # A worker died hard (OOM killer etc), render the rest in this process
+                        if cpu is not fallback:
+                            print("Process pool broke, rendering the remaining pages in this process")
+                            cpu = fallback
+                        rendered = await loop.run_in_executor(cpu, self.render, *work[idx], data)
+                except Exception as err:
+                    fail(idx, err)
+                    continue
+                await write_queue.put((idx, rendered))
+
+        async def writer() -> None:
+            while (job := await write_queue.get()) is not None:
+                idx, rendered = job
+                try:
+                    results[idx] = (True, await loop.run_in_executor(io, self.write, *work[idx], rendered))
+                except Exception as err:
+                    fail(idx, err)
+                    continue
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self.io_workers) as io, self.render_executor() as cpu, fallback:
+            writers = [asyncio.create_task(writer()) for _ in range(self.io_workers)]
+            renderers = [asyncio.create_task(renderer()) for _ in range(render_workers)]
+            await asyncio.gather(*(reader() for _ in range(self.io_workers)))
+
+            # Each stage gets one stop marker per worker once everything upstream is done
+            for _ in renderers:
+                await render_queue.put(None)
+            await asyncio.gather(*renderers)
+            for _ in writers:
+                await write_queue.put(None)
+            await asyncio.gather(*writers)
+        return results
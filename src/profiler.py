@@ -0,0 +1,126 @@
+from __future__ import annotations
+from typing import Dict, List
+
+import time
+
+# The build stages we time, in pipeline order
+STAGES = ('read', 'block_split', 'block_type', 'inline_split', 'node_build', 'to_html', 'template', 'write')
+
+# Set by --profile, everything else just calls stage() and gets a no-op when this is None
+ACTIVE: BuildProfiler | None = None
+
+
+class NullStage():
+    __slots__ = ()
+
+    def __enter__(self) -> NullStage:
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+NULL_STAGE = NullStage()
+
+
+class Stage():
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler:BuildProfiler, name:str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> Stage:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Page():
+    __slots__ = ('profiler', 'path', 'start')
+
+    def __init__(self, profiler:BuildProfiler, path:str):
+        self.profiler = profiler
+        self.path = path
+        self.start = 0.0
+
+    def __enter__(self) -> Page:
+        self.profiler.current_page = self.path
+        self.profiler.pages[self.path] = {}
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.profiler.page_times[self.path] = time.perf_counter() - self.start
+        self.profiler.current_page = None
+        return False
+
+
+class BuildProfiler():
+    # Wall time and call counts per stage, for the whole build and for each page
+    # stage name -> [seconds, calls]
+    def __init__(self):
+        self.totals: Dict[str, List[float]] = {}
+        self.pages: Dict[str, Dict[str, List[float]]] = {}
+        self.page_times: Dict[str, float] = {}
+        self.current_page: str | None = None
+
+    def stage(self, name:str) -> Stage:
+        return Stage(self, name)
+
+    def page(self, path:str) -> Page:
+        return Page(self, path)
+
+    def add(self, name:str, seconds:float) -> None:
+        total = self.totals.setdefault(name, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+        if self.current_page is not None:
+            page_total = self.pages[self.current_page].setdefault(name, [0.0, 0])
+            page_total[0] += seconds
+            page_total[1] += 1
+
+    def report(self) -> dict:
+        def stages(times:Dict[str, List[float]]) -> dict:
+            ordered = [name for name in STAGES if name in times] + sorted(set(times) - set(STAGES))
+            return {name: {'seconds': round(times[name][0], 6), 'calls': int(times[name][1])} for name in ordered}
+
+        return {
+            'total_seconds': round(sum(self.page_times.values()), 6),
+            'stages': stages(self.totals),
+            'pages': {
+                path: {'seconds': round(self.page_times.get(path, 0.0), 6), 'stages': stages(times)}
+                for path, times in self.pages.items()
+            },
+        }
+
+    def summary(self, top:int = 10) -> str:
+        total = sum(self.page_times.values())
+        lines = [f"Profiled {len(self.page_times)} page(s) in {total * 1000:.1f} ms"]
+
+        lines.append("Stages:")
+        for name, (seconds, calls) in sorted(self.totals.items(), key=lambda item: -item[1][0]):
+            share = (seconds / total * 100) if total else 0.0
+            lines.append(f"  {name:<13} {seconds * 1000:10.2f} ms {share:5.1f}%  {int(calls)} call(s)")
+
+        lines.append("Slowest pages:")
+        slowest = sorted(self.page_times.items(), key=lambda item: -item[1])[:top]
+        for path, seconds in slowest:
+            worst = max(self.pages[path].items(), key=lambda item: item[1][0], default=None)
+            worst_text = '' if worst is None else f" (mostly {worst[0]})"
+            lines.append(f"  {seconds * 1000:10.2f} ms  {path}{worst_text}")
+        return '\n'.join(lines)
+
+
+def stage(name:str) -> Stage | NullStage:
+    if ACTIVE is None:
+        return NULL_STAGE
+    return ACTIVE.stage(name)
+
+def page(path:str) -> Page | NullStage:
+    if ACTIVE is None:
+        return NULL_STAGE
+    return ACTIVE.page(path)
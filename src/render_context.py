@@ -0,0 +1,80 @@
+from __future__ import annotations
+from typing import Dict, List
+
+import hashlib
+import json
+
+from .markdown_helpers import extract_markdown_images, extract_markdown_links
+
+# Everything about where the site ends up that changes the html of a page
+# It gets handed down to the leaf builders (and the template), so a url is fixed once when its node is built
+# instead of search-and-replacing the finished page (which also hit code blocks and prose)
+# assets maps root relative urls of static files to their fingerprinted names ('/index.css' -> '/index.3f2a9c1b04de.css')
+class RenderContext():
+    __slots__ = ('base_path', 'assets', 'assets_key')
+
+    def __init__(self, base_path:str = '/', assets:Dict[str, str] | None = None):
+        if not base_path.endswith('/'):
+            base_path = f'{base_path}/'
+        self.base_path = base_path
+        self.assets = assets or {}
+        self.assets_key = ''
+        if self.assets:
+            self.assets_key = hashlib.sha256(json.dumps(self.assets, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def url(self, url:str) -> str:
+        # Only root relative urls move with the base path, external links (and //host ones), anchors and relative paths don't
+        if not url.startswith('/') or url.startswith('//'):
+            return url
+
+        if self.assets:
+            # /index.css?v=2#x -> look up /index.css, keep the rest
+            path = url_path(url)
+            url = self.assets.get(path, path) + url[len(path):]
+
+        if self.base_path == '/':
+            return url
+        return self.base_path + url[1:]
+
+    # The same context cut down to the asset names markdown can actually use
+    # Cached fragments get rendered with (and keyed on) this, so a new name for some other file doesn't touch them
+    def scoped(self, markdown:str) -> RenderContext:
+        if not self.assets:
+            return self
+        used = {url: self.assets[url] for url in extract_root_urls(markdown) if url in self.assets}
+        return RenderContext(self.base_path, used)
+
+    # For cache keys - two contexts with the same key render the same markdown to the same html
+    def key(self) -> str:
+        if not self.assets_key:
+            return self.base_path
+        return f'{self.base_path}\0{self.assets_key}'
+
+    def __eq__(self, other:object) -> bool:
+        if not isinstance(other, RenderContext):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __repr__(self) -> str:
+        return f"RenderContext(base_path: {self.base_path}, assets: {len(self.assets)})"
+
+
+DEFAULT_CONTEXT = RenderContext()
+
+
+def url_path(url:str) -> str:
+    # /index.css?v=2#x -> /index.css
+    cut = min((idx for idx in (url.find('?'), url.find('#')) if idx != -1), default=len(url))
+    return url[:cut]
+
+
+def extract_root_urls(markdown:str) -> List[str]:
+    # Root relative urls in the images and links of some markdown, as the paths the asset map is keyed by
+    urls = []
+    for _, url in extract_markdown_images(markdown) + extract_markdown_links(markdown):
+        if url.startswith('/') and not url.startswith('//'):
+            urls.append(url_path(url))
+    return urls
@@ -0,0 +1,154 @@
+from __future__ import annotations
+from typing import Dict, List, Iterable, Tuple
+
+import os
+import shutil
+import time
+
+from .manifest import hash_file, remove_output
+from .parallel import run_threaded, make_dirs, format_rate, IO_WORKERS
+
+SYNC_MODES = ('copy', 'hardlink', 'reflink')
+COPY_CHUNK = 1 << 30  # copy_file_range is happy to take big bites
+
+
+class SyncStats():
+    def __init__(self):
+        self.copied = 0
+        self.skipped = 0
+        self.removed = 0
+        self.bytes = 0  # copied, for the throughput
+        self.seconds = 0.0
+
+    def rate(self) -> str:
+        return format_rate(self.copied, self.bytes, self.seconds)
+
+    def __repr__(self) -> str:
+        return f"SyncStats(copied: {self.copied}, skipped: {self.skipped}, removed: {self.removed})"
+
+
+def list_files(root:str) -> List[str]:
+    # Every file under root, relative to root, in a stable order
+    found = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for name in sorted(file_names):
+            found.append(os.path.relpath(os.path.join(dir_path, name), root))
+    return found
+
+
+def files_match(src:str, dst:str, use_hash:bool = False) -> bool:
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    src_stat = os.stat(src)
+
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    # Hardlinks are the same file, nothing could be different
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+    if use_hash:
+        return hash_file(src) == hash_file(dst)
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+
+def reflink_copy(src:str, dst:str) -> None:
+    # copy_file_range lets the kernel share extents (reflink) on filesystems that can, and skips userspace buffers on ones that can't
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        remaining = os.fstat(src_file.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src_file.fileno(), dst_file.fileno(), min(remaining, COPY_CHUNK))
+            if copied == 0:
+                break
+            remaining -= copied
+    shutil.copystat(src, dst)
+
+
+def place_file(src:str, dst:str, mode:str = 'copy') -> None:
+    # Never write through an existing dst - if it is a hardlink that would scribble on static/
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    if mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass  # cross device or unsupported filesystem, fall through to a copy
+
+    elif mode == 'reflink' and hasattr(os, 'copy_file_range'):
+        try:
+            reflink_copy(src, dst)
+            return
+        except OSError:
+            if os.path.exists(dst):
+                os.remove(dst)
+
+    shutil.copy2(src, dst)
+
+def copy_file(src:str, dst:str, mode:str = 'copy') -> int:
+    # place_file for the thread pool, hands back the size for the throughput numbers
+    place_file(src, dst, mode)
+    return os.path.getsize(src)
+
+
+def sync_tree(src_root:str, dest_root:str, previous:Iterable[str] = (), mode:str = 'copy', use_hash:bool = False,
+              names:Dict[str, str] | None = None, workers:int = IO_WORKERS) -> Tuple[SyncStats, List[str]]:
+    # Makes dest_root mirror src_root without touching anything that didn't change
+    # previous is what we synced last time, anything in it that's gone from dest_root's side gets pruned
+    # (dest_root also has generated pages in it, so we can only prune what we know we put there)
+    # names renames files on the way (source rel path -> output rel path), that's how fingerprinted assets land
+    # The checks and the copies both go to a pool of worker threads, thousands of small files are all disk latency
+    if mode not in SYNC_MODES:
+        raise ValueError(f"Unknown sync mode {mode}")
+
+    start = time.perf_counter()
+    stats = SyncStats()
+    sources = list_files(src_root)
+    current = sources if names is None else [names.get(rel_path, rel_path) for rel_path in sources]
+    pairs = [(os.path.join(src_root, rel_path), os.path.join(dest_root, dest_rel_path)) for rel_path, dest_rel_path in zip(sources, current)]
+
+    to_copy = []
+    for (src, dst), (ok, matched) in zip(pairs, run_threaded(files_match, [(src, dst, use_hash) for src, dst in pairs], workers)):
+        if not ok:
+            raise matched
+        if matched:
+            stats.skipped += 1
+        else:
+            to_copy.append((src, dst, mode))
+
+    make_dirs(os.path.dirname(dst) for _, dst, _ in to_copy)
+    for ok, size in run_threaded(copy_file, to_copy, workers):
+        if not ok:
+            raise size
+        stats.copied += 1
+        stats.bytes += size
+
+    current_set = set(current)
+    for rel_path in previous:
+        if rel_path not in current_set and remove_output(os.path.join(dest_root, rel_path), dest_root):
+            stats.removed += 1
+
+    stats.seconds = time.perf_counter() - start
+    return stats, current
+
+
+def sync_files(src_root:str, dest_root:str, rel_paths:Iterable[str], mode:str = 'copy') -> SyncStats:
+    # Targeted version of sync_tree for when we already know which files changed (watch mode)
+    stats = SyncStats()
+    for rel_path in rel_paths:
+        src = os.path.join(src_root, rel_path)
+        dst = os.path.join(dest_root, rel_path)
+        if not os.path.exists(src):
+            if remove_output(dst, dest_root):
+                stats.removed += 1
+            continue
+
+        dst_dir = os.path.dirname(dst)
+        if not os.path.exists(dst_dir):
+            os.makedirs(dst_dir)
+        place_file(src, dst, mode)
+        stats.copied += 1
+    return stats
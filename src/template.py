@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import List, Dict, TextIO
+from .htmlnode import HTMLNode
+from .flatdoc import FlatDocument
+from .render_context import RenderContext, DEFAULT_CONTEXT
+
+import hashlib
+import re
+
+# {{ Name }} with any amount of whitespace inside the braces
+PLACEHOLDER_RE = re.compile(r'\{\{\s*(\w*)\s*\}\}')
+SLOTS = ('Title', 'Content')
+REQUIRED_SLOTS = ('Content',)
+# Urls in the template's own markup (stylesheets, nav links) - page content gets its urls fixed when it's parsed
+URL_ATTR_RE = re.compile(r'\b(href|src)="([^"]*)"')
+
+
+def rewrite_urls(html:str, context:RenderContext) -> str:
+    return URL_ATTR_RE.sub(lambda match: f'{match.group(1)}="{context.url(match.group(2))}"', html)
+
+def root_urls(html:str) -> List[str]:
+    # Root relative urls in href / src attributes, for the dependency graph
+    return [url for _, url in URL_ATTR_RE.findall(html) if url.startswith('/') and not url.startswith('//')]
+
+
+class Template():
+    # A template split into static segments with slots between them
+    # segments always has exactly one more entry than slots: seg0 slot0 seg1 slot1 ... segN
+    # Values go in as-is, the context is only for the static parts (and for building the content that goes in the slots)
+    # urls are the root relative urls the template linked to before the context got to them
+    def __init__(self, segments:List[str], slots:List[str], context:RenderContext = DEFAULT_CONTEXT, hash:str = '',
+                 urls:List[str] | None = None):
+        if len(segments) != len(slots) + 1:
+            raise ValueError("Template needs one more segment than slots")
+        self.segments = segments
+        self.slots = slots
+        self.context = context
+        self.hash = hash
+        self.urls = urls or []
+
+    @classmethod
+    def compile(cls, text:str, context:RenderContext = DEFAULT_CONTEXT) -> Template:
+        segments = []
+        slots = []
+        current = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            name = match.group(1)
+            if name not in SLOTS:
+                line = text.count('\n', 0, match.start()) + 1
+                raise ValueError(f"Unknown template placeholder '{match.group(0)}' on line {line}")
+            segments.append(text[current:match.start()])
+            slots.append(name)
+            current = match.end()
+        segments.append(text[current:])
+
+        # Anything left with braces is a typo'd placeholder that would otherwise be written out as-is
+        for segment in segments:
+            if '{{' in segment or '}}' in segment:
+                raise ValueError("Malformed template placeholder")
+
+        for name in REQUIRED_SLOTS:
+            if name not in slots:
+                raise ValueError(f"Template is missing the {{{{ {name} }}}} placeholder")
+
+        # The static parts only need their links fixed once, not once per page
+        urls = sorted({url for segment in segments for url in root_urls(segment)})
+        segments = [rewrite_urls(segment, context) for segment in segments]
+        # Hashing the compiled segments covers the base path and the names of the assets the template links to,
+        # the assets a page links to itself are checked per page (manifest.is_fresh)
+        digest = hashlib.sha256(text.encode('utf-8'))
+        for segment in segments:
+            digest.update(b'\0' + segment.encode('utf-8'))
+        return cls(segments, slots, context, digest.hexdigest(), urls)
+
+    @classmethod
+    def load(cls, path:str, context:RenderContext = DEFAULT_CONTEXT) -> Template:
+        with open(path, 'r') as template:
+            return cls.compile(template.read(), context)
+
+    def render(self, values:Dict[str, str]) -> str:
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return ''.join(parts)
+
+    # Same as render but straight into a file, HTMLNode / FlatDocument values get streamed chunk by chunk
+    def write(self, stream:TextIO, values:Dict[str, str | HTMLNode | FlatDocument]) -> None:
+        write = stream.write
+        write(self.segments[0])
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            value = values[slot]
+            if isinstance(value, (HTMLNode, FlatDocument)):
+                value.write_html(stream)
+            else:
+                write(value)
+            write(segment)
@@ -10,6 +10,9 @@ class TextType (Enum):
 
 
 class TextNode():
+    # No per-instance __dict__, big pages make a lot of these
+    __slots__ = ('text', 'text_type', 'url')
+
     def __init__(self, text:str, text_type:TextType, url:str | None = None):
         self.text = text
         self.text_type = text_type
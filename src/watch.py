@@ -0,0 +1,153 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple, Set
+
+import os
+import time
+
+from .manifest import BuildManifest, hash_file
+from .template import Template
+from .render_context import RenderContext
+from .static_sync import list_files, sync_files
+from .main import build_page, generate_pages_recursive, sync_static, precompress
+from .depgraph import page_assets
+
+# Plain polling - the stdlib has no inotify binding, and stat-ing a few thousand files is a couple of milliseconds
+POLL_INTERVAL = 0.1
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def snapshot(root:str) -> Snapshot:
+    # relative path -> (mtime, size) for every file under root
+    found = {}
+    for rel_path in list_files(root):
+        try:
+            stat = os.stat(os.path.join(root, rel_path))
+        except FileNotFoundError:
+            continue  # deleted between the listing and the stat, next poll picks it up
+        found[rel_path] = (stat.st_mtime_ns, stat.st_size)
+    return found
+
+
+def diff_snapshots(old:Snapshot, new:Snapshot) -> Tuple[Set[str], Set[str]]:
+    changed = {path for path, stamp in new.items() if old.get(path) != stamp}
+    removed = set(old) - set(new)
+    return changed, removed
+
+
+class SiteWatcher():
+    # Polls content/, static/ and the template and only redoes the work a change actually needs
+    def __init__(self, content_root:str, static_root:str, template_path:str, html_root:str, base_path:str,
+                 manifest:BuildManifest, static_mode:str = 'copy', jobs:int = 1,
+                 fingerprint:bool = False, assets:Dict[str, str] | None = None, formats:List[str] | None = None):
+        self.content_root = content_root
+        self.static_root = static_root
+        self.template_path = template_path
+        self.html_root = html_root
+        self.base_path = base_path
+        self.manifest = manifest
+        self.static_mode = static_mode
+        self.jobs = jobs
+        self.fingerprint = fingerprint
+        self.assets = assets or {}
+        self.formats = formats
+
+        self.template = Template.load(template_path, RenderContext(base_path, self.assets))
+        self.content = snapshot(content_root)
+        self.static = snapshot(static_root)
+        self.template_stamp = self.stamp_template()
+
+    def stamp_template(self) -> Tuple[int, int]:
+        stat = os.stat(self.template_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def dest_for(self, rel_path:str) -> str:
+        # Same mapping find_content_pages uses: content/a/b/x.md -> docs/a/b/index.html
+        return os.path.join(self.html_root, os.path.dirname(rel_path))
+
+    def rebuild_template(self) -> None:
+        # Every page depends on the template, so this is the one case that re-renders everything
+        self.template = Template.load(self.template_path, RenderContext(self.base_path, self.assets))
+        generate_pages_recursive(self.content_root, self.template_path, self.html_root, self.base_path, self.manifest, self.jobs, self.assets)
+
+    def rebuild_pages(self, changed:Set[str], removed:Set[str]) -> None:
+        for rel_path in sorted(changed):
+            from_path = os.path.join(self.content_root, rel_path)
+            dest_path = self.dest_for(rel_path)
+            print(f"Generating page from {from_path} to {dest_path}")
+            try:
+                result = build_page(from_path, dest_path, self.template)
+            except Exception as err:
+                # Half typed markdown shouldn't kill the watcher
+                print(f"  {type(err).__name__}: {err}")
+                continue
+            if not result.written:
+                print("  output unchanged")
+            self.manifest.record(from_path, hash_file(from_path), self.template.hash, result.path, result.hash,
+                                 page_assets(from_path, self.assets))
+
+        if removed:
+            current = [os.path.join(self.content_root, rel_path) for rel_path in self.content]
+            for output in self.manifest.remove_stale(current, self.html_root):
+                print(f"Removed {output} (source deleted)")
+
+    def sync_static(self, changed:Set[str], removed:Set[str]) -> None:
+        if self.fingerprint:
+            # A changed asset gets a new name, so every page linking to it has to be re-rendered too
+            # (the manifest's dependency graph keeps that to the pages that actually link to it)
+            assets = sync_static(self.manifest, self.static_mode, False, True, self.static_root, self.html_root)
+            if assets != self.assets:
+                self.assets = assets
+                try:
+                    self.rebuild_template()
+                except (ValueError, RuntimeError) as err:
+                    print(f"Rebuild for new asset names failed: {err}")
+            return
+
+        stats = sync_files(self.static_root, self.html_root, sorted(changed | removed), self.static_mode)
+        self.manifest.static = sorted(self.static)
+        print(f"Static files: {stats.copied} copied, {stats.removed} removed")
+
+    def poll(self) -> bool:
+        # One pass - returns True if anything got rebuilt
+        start = time.perf_counter()
+        did_work = False
+
+        template_stamp = self.stamp_template()
+        new_content = snapshot(self.content_root)
+        content_changed, content_removed = diff_snapshots(self.content, new_content)
+        self.content = new_content
+
+        if template_stamp != self.template_stamp:
+            self.template_stamp = template_stamp
+            try:
+                self.rebuild_template()
+            except (ValueError, RuntimeError) as err:
+                print(f"Template rebuild failed: {err}")
+            did_work = True
+        elif content_changed or content_removed:
+            self.rebuild_pages(content_changed, content_removed)
+            did_work = True
+
+        new_static = snapshot(self.static_root)
+        static_changed, static_removed = diff_snapshots(self.static, new_static)
+        self.static = new_static
+        if static_changed or static_removed:
+            self.sync_static(static_changed, static_removed)
+            did_work = True
+
+        if did_work:
+            if self.formats is not None:
+                precompress(self.manifest, self.formats, self.jobs, self.html_root)
+            self.manifest.save()
+            print(f"Rebuilt in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return did_work
+
+    def run(self, interval:float = POLL_INTERVAL) -> None:
+        print(f"Watching {self.content_root}, {self.static_root} and {self.template_path} (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(interval)
+                self.poll()
+        except KeyboardInterrupt:
+            print("Stopped watching")
@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.assets import fingerprint_name, should_fingerprint, build_asset_map, asset_urls, ASSET_MANIFEST
+from src.manifest import BuildManifest
+from src.render_context import RenderContext
+from src.template import Template
+from src.main import sync_static, generate_pages_recursive
+
+
+class TestAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, 'static')
+        self.docs = os.path.join(self.tmp.name, 'docs')
+        os.makedirs(os.path.join(self.static, 'images'))
+        os.makedirs(self.docs)
+        self.write(os.path.join(self.static, 'index.css'), "body {}")
+        self.write(os.path.join(self.static, 'images', 'a.png'), "png bytes")
+        self.write(os.path.join(self.static, 'robots.txt'), "User-agent: *")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as dest:
+            dest.write(text)
+
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name(os.path.join('images', 'a.png'), 'abcdef0123456789'), os.path.join('images', 'a.abcdef012345.png'))
+        self.assertEqual(fingerprint_name('LICENSE', 'abcdef0123456789'), 'LICENSE.abcdef012345')
+
+    def test_excluded_names(self):
+        self.assertFalse(should_fingerprint('robots.txt'))
+        self.assertFalse(should_fingerprint('CNAME'))
+        self.assertTrue(should_fingerprint(os.path.join('images', 'a.png')))
+
+    def test_asset_map_follows_content(self):
+        first = build_asset_map(self.static, ['index.css'])
+        self.write(os.path.join(self.static, 'index.css'), "body { color: red }")
+        second = build_asset_map(self.static, ['index.css'])
+        self.assertNotEqual(first['index.css'], second['index.css'])
+        self.assertTrue(second['index.css'].startswith('index.') and second['index.css'].endswith('.css'))
+
+    def test_asset_urls(self):
+        urls = asset_urls({os.path.join('images', 'a.png'): os.path.join('images', 'a.123.png'), 'robots.txt': 'robots.txt'})
+        self.assertEqual(urls, {'/images/a.png': '/images/a.123.png'})
+
+    def test_context_rewrites_assets(self):
+        context = RenderContext('/site/', {'/index.css': '/index.123.css'})
+        self.assertEqual(context.url('/index.css'), '/site/index.123.css')
+        self.assertEqual(context.url('/index.css?v=1#top'), '/site/index.123.css?v=1#top')
+        self.assertEqual(context.url('/blog'), '/site/blog')
+        self.assertNotEqual(context.key(), RenderContext('/site/').key())
+
+    def test_template_stylesheet_and_hash(self):
+        text = '<link href="/index.css" rel="stylesheet" />{{ Content }}'
+        plain = Template.compile(text)
+        hashed = Template.compile(text, RenderContext('/', {'/index.css': '/index.123.css'}))
+        self.assertEqual(hashed.segments[0], '<link href="/index.123.css" rel="stylesheet" />')
+        self.assertNotEqual(plain.hash, hashed.hash)
+
+    def test_sync_static_fingerprinted(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, 'manifest.json'), '/')
+        urls = sync_static(manifest, fingerprint=True, static_root=self.static, html_root=self.docs)
+
+        css = urls['/index.css']
+        self.assertTrue(os.path.exists(os.path.join(self.docs, css[1:])))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, 'index.css')))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, 'robots.txt')))
+        with open(os.path.join(self.docs, ASSET_MANIFEST)) as src:
+            self.assertEqual(json.load(src)['index.css'], css[1:])
+
+        # Old names get pruned once the content (and so the name) changes
+        self.write(os.path.join(self.static, 'index.css'), "body { color: red }")
+        new_urls = sync_static(manifest, fingerprint=True, static_root=self.static, html_root=self.docs)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, css[1:])))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, new_urls['/index.css'][1:])))
+
+        # And turning it back off goes back to the plain names
+        sync_static(manifest, static_root=self.static, html_root=self.docs)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, 'index.css')))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, ASSET_MANIFEST)))
+
+    def test_pages_link_fingerprinted_assets(self):
+        content = os.path.join(self.tmp.name, 'content')
+        os.makedirs(content)
+        self.write(os.path.join(content, 'index.md'), "# Home\n\n![a](/images/a.png)")
+        template = os.path.join(self.tmp.name, 'template.html')
+        self.write(template, '<link href="/index.css" />{{ Content }}')
+
+        manifest = BuildManifest(os.path.join(self.tmp.name, 'manifest.json'), '/')
+        urls = sync_static(manifest, fingerprint=True, static_root=self.static, html_root=self.docs)
+        generate_pages_recursive(content, template, self.docs, '/', manifest, 1, urls)
+        with open(os.path.join(self.docs, 'index.html')) as src:
+            html = src.read()
+        self.assertIn(f'href="{urls["/index.css"]}"', html)
+        self.assertIn(f'src="{urls["/images/a.png"]}"', html)
+
+        # A changed asset means a new name, the manifest has to notice even though the markdown didn't change
+        self.write(os.path.join(self.static, 'images', 'a.png'), "new png bytes")
+        urls = sync_static(manifest, fingerprint=True, static_root=self.static, html_root=self.docs)
+        stats = generate_pages_recursive(content, template, self.docs, '/', manifest, 1, urls)
+        self.assertEqual(stats.written, 1)
+        with open(os.path.join(self.docs, 'index.html')) as src:
+            self.assertIn(f'src="{urls["/images/a.png"]}"', src.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
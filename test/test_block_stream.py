@@ -0,0 +1,83 @@
+import io
+import os
+import random
+import tempfile
+import tracemalloc
+import unittest
+
+from src.markdown_helpers import markdown_to_blocks, iter_markdown_blocks, extract_title
+from src.markdown_converter import markdown_to_html_node, stream_markdown_html_node
+from src.template import Template
+from src.render_context import RenderContext
+from src import main as site_main
+from bench.corpus import generate_markdown
+
+
+class TestBlockStream(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        cases = [
+            "a\n\n\nb",
+            "a\n \nb",
+            "a\n\n \n\nb",
+            "\n\n\n\na\n\n\n\n\nb\n",
+            "x\r\n\r\ny",
+            "  a  \n\n  b",
+            "",
+        ]
+        rng = random.Random(7)
+        cases.extend(generate_markdown(rng, 25) for _ in range(20))
+        for md in cases:
+            self.assertEqual(list(iter_markdown_blocks(io.StringIO(md, newline=''))), markdown_to_blocks(md), repr(md))
+
+    def test_blocks_are_lazy(self):
+        def lines():
+            yield "first block\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(iter_markdown_blocks(lines())), "first block")
+
+    def test_markdown_to_html_node_takes_lines(self):
+        md = generate_markdown(random.Random(8), 30)
+        self.assertEqual(markdown_to_html_node(io.StringIO(md)).to_html(), markdown_to_html_node(md).to_html())
+
+    def test_streamed_node_matches(self):
+        md = generate_markdown(random.Random(9), 30)
+        self.assertEqual(stream_markdown_html_node(io.StringIO(md)).to_html(), markdown_to_html_node(md).to_html())
+
+    def test_extract_title_from_lines(self):
+        self.assertEqual(extract_title(io.StringIO("\n# The Title\n\nbody\n")), "The Title")
+
+    def test_large_page_matches_normal_page(self):
+        md = generate_markdown(random.Random(10), 200)
+        template = Template.compile("<title>{{ Title }}</title>{{ Content }}", RenderContext('/site/'))
+        with tempfile.TemporaryDirectory() as root:
+            src = os.path.join(root, 'index.md')
+            with open(src, 'w') as dest:
+                dest.write(md)
+            with open(site_main.build_page(src, os.path.join(root, 'normal'), template).path) as out:
+                normal = out.read()
+            with open(site_main.build_large_page(src, os.path.join(root, 'large'), template).path) as out:
+                large = out.read()
+        self.assertEqual(large, normal)
+
+    def test_bounded_memory(self):
+        # Half a MB of markdown should stream through in a small fraction of that
+        md = generate_markdown(random.Random(11), 2500)
+        self.assertGreater(len(md), 500_000)
+        with tempfile.TemporaryDirectory() as root:
+            src = os.path.join(root, 'big.md')
+            with open(src, 'w') as dest:
+                dest.write(md)
+            del md
+
+            tracemalloc.start()
+            with open(src) as lines, open(os.devnull, 'w') as sink:
+                stream_markdown_html_node(lines).write_html(sink)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self.assertLess(peak, 100_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
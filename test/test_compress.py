@@ -0,0 +1,120 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from src.compress import compress_file, compress_tree, resolve_formats, ENCODERS, MIN_SIZE
+from src.output import write_output
+
+PAGE = "<html><body>" + "<p>the same paragraph over and over</p>" * 40 + "</body></html>"
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.page = os.path.join(self.root, 'index.html')
+        write_output(self.page, PAGE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_gzip_sibling(self):
+        self.assertEqual(compress_file(self.page, ['.gz']), (1, 0, [self.page + '.gz']))
+        with gzip.open(self.page + '.gz', 'rt') as src:
+            self.assertEqual(src.read(), PAGE)
+        self.assertEqual(os.stat(self.page + '.gz').st_mtime_ns, os.stat(self.page).st_mtime_ns)
+
+    def test_unchanged_output_skipped(self):
+        compress_file(self.page, ['.gz'])
+        self.assertEqual(compress_file(self.page, ['.gz']), (0, 1, [self.page + '.gz']))
+        # Identical re-render doesn't touch the page, so nothing to recompress
+        write_output(self.page, PAGE)
+        self.assertEqual(compress_file(self.page, ['.gz']), (0, 1, [self.page + '.gz']))
+
+    def test_changed_output_recompressed(self):
+        compress_file(self.page, ['.gz'])
+        write_output(self.page, PAGE.replace('paragraph', 'sentence'))
+        os.utime(self.page, ns=(0, 5_000_000_000))
+        self.assertEqual(compress_file(self.page, ['.gz']), (1, 0, [self.page + '.gz']))
+        with gzip.open(self.page + '.gz', 'rt') as src:
+            self.assertIn('sentence', src.read())
+
+    def test_deterministic(self):
+        compress_file(self.page, ['.gz'])
+        with open(self.page + '.gz', 'rb') as src:
+            first = src.read()
+        os.remove(self.page + '.gz')
+        compress_file(self.page, ['.gz'])
+        with open(self.page + '.gz', 'rb') as src:
+            self.assertEqual(src.read(), first)
+
+    def test_small_files_skipped(self):
+        small = os.path.join(self.root, 'small.css')
+        write_output(small, 'a' * (MIN_SIZE - 1))
+        self.assertEqual(compress_file(small, ['.gz']), (0, 0, []))
+        self.assertFalse(os.path.exists(small + '.gz'))
+
+    def test_tree(self):
+        os.makedirs(os.path.join(self.root, 'blog'))
+        write_output(os.path.join(self.root, 'blog', 'index.html'), PAGE)
+        write_output(os.path.join(self.root, 'index.css'), "body { color: red }\n" * 40)
+        with open(os.path.join(self.root, 'photo.png'), 'wb') as dest:
+            dest.write(b'\x89PNG' * 200)
+
+        stats, compressed = compress_tree(self.root, ['.gz'], jobs=2)
+        self.assertEqual((stats.written, stats.unchanged, stats.removed), (3, 0, 0))
+        self.assertEqual(compressed, [os.path.join('blog', 'index.html.gz'), 'index.css.gz', 'index.html.gz'])
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'photo.png.gz')))
+
+        stats, again = compress_tree(self.root, ['.gz'], previous=compressed)
+        self.assertEqual((stats.written, stats.unchanged, stats.removed), (0, 3, 0))
+        self.assertEqual(again, compressed)
+
+    def test_only_our_siblings_removed(self):
+        _, compressed = compress_tree(self.root, ['.gz'])
+        with open(os.path.join(self.root, 'download.tar.gz'), 'wb') as dest:
+            dest.write(b'not ours')
+        with open(os.path.join(self.root, 'data.json.gz'), 'wb') as dest:
+            dest.write(b'not ours either, and data.json is not there')
+        os.remove(self.page)
+
+        stats, compressed = compress_tree(self.root, ['.gz'], previous=compressed)
+        self.assertEqual((stats.removed, compressed), (1, []))
+        self.assertFalse(os.path.exists(self.page + '.gz'))
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'download.tar.gz')))
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'data.json.gz')))
+
+    def test_static_siblings_left_alone(self):
+        # A static data.json.gz next to a static data.json ships as-is, it's neither overwritten nor deleted
+        write_output(os.path.join(self.root, 'data.json'), '{"a": 1}' * 100)
+        write_output(os.path.join(self.root, 'data.json.gz'), 'hand made')
+        static = ['data.json', 'data.json.gz']
+        stats, compressed = compress_tree(self.root, ['.gz'], previous=['data.json.gz'], static=static)
+        self.assertEqual(compressed, ['index.html.gz'])
+        with open(os.path.join(self.root, 'data.json.gz')) as src:
+            self.assertEqual(src.read(), 'hand made')
+
+    def test_no_formats_removes_ours(self):
+        _, compressed = compress_tree(self.root, ['.gz'])
+        stats, compressed = compress_tree(self.root, [], previous=compressed)
+        self.assertEqual((stats.removed, compressed), (1, []))
+        self.assertFalse(os.path.exists(self.page + '.gz'))
+
+    def test_shrunk_file_loses_sibling(self):
+        _, compressed = compress_tree(self.root, ['.gz'])
+        write_output(self.page, 'tiny')
+        stats, compressed = compress_tree(self.root, ['.gz'], previous=compressed)
+        self.assertEqual((stats.removed, compressed), (1, []))
+        self.assertFalse(os.path.exists(self.page + '.gz'))
+
+    def test_resolve_formats(self):
+        self.assertEqual(resolve_formats('gz'), ['.gz'])
+        self.assertEqual(resolve_formats('all'), list(ENCODERS))
+        self.assertIn('.gz', resolve_formats('all'))
+        with self.assertRaises(ValueError):
+            resolve_formats('lzma')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import random
+import tempfile
+import unittest
+
+from bench.corpus import generate_markdown, write_corpus, FEATURES
+from src.markdown_converter import markdown_to_html_node
+from src.markdown_helpers import extract_title
+
+
+class TestCorpus(unittest.TestCase):
+    def test_generated_markdown_parses(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            md = generate_markdown(rng, 30)
+            self.assertTrue(markdown_to_html_node(md).to_html().startswith('<div>'))
+            extract_title(md)
+
+    def test_feature_subset(self):
+        md = generate_markdown(random.Random(2), 50, ['headers'])
+        for block in md.strip().split('\n\n'):
+            self.assertTrue(block.startswith('#'))
+
+    def test_same_seed_same_corpus(self):
+        self.assertEqual(generate_markdown(random.Random(3), 10, FEATURES), generate_markdown(random.Random(3), 10, FEATURES))
+
+    def test_write_corpus_layout(self):
+        with tempfile.TemporaryDirectory() as root:
+            written = write_corpus(root, 3, 5)
+            self.assertEqual(written[0], os.path.join(root, 'index.md'))
+            self.assertTrue(os.path.exists(os.path.join(root, 'page2', 'index.md')))
+
+
+if __name__ == "__main__":
+    unittest.main()
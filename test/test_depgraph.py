@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+
+from src.depgraph import page_assets, asset_url, dependents, graph, find_orphans
+from src.manifest import BuildManifest
+from src.main import generate_pages_recursive, sync_static, prune_orphans
+
+TEMPLATE = '<link href="/index.css" />{{ Title }}{{ Content }}'
+
+
+class TestDepGraph(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.static = os.path.join(root, 'static')
+        self.docs = os.path.join(root, 'docs')
+        self.template = os.path.join(root, 'template.html')
+        os.makedirs(os.path.join(self.content, 'blog'))
+        os.makedirs(os.path.join(self.static, 'images'))
+        os.makedirs(self.docs)
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.static, 'index.css'), "body {}")
+        self.write(os.path.join(self.static, 'images', 'a.png'), "a")
+        self.write(os.path.join(self.static, 'images', 'b.png'), "b")
+        self.write(os.path.join(self.content, 'index.md'), "# Home\n\n![a](/images/a.png) ![ext](https://x.com/c.png)")
+        self.write(os.path.join(self.content, 'blog', 'index.md'), "# Blog\n\n![b](/images/b.png)")
+        self.manifest = BuildManifest(os.path.join(root, 'manifest.json'), '/')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as dest:
+            dest.write(text)
+
+    def build(self, fingerprint=False):
+        assets = sync_static(self.manifest, fingerprint=fingerprint, static_root=self.static, html_root=self.docs)
+        return generate_pages_recursive(self.content, self.template, self.docs, '/', self.manifest, 1, assets)
+
+    def source(self, *parts):
+        return os.path.normpath(os.path.join(self.content, *parts))
+
+    def test_page_assets(self):
+        found = page_assets(os.path.join(self.content, 'index.md'), {'/images/a.png': '/images/a.1.png'})
+        self.assertEqual(found, {'/images/a.png': '/images/a.1.png'})
+        self.write(os.path.join(self.content, 'links.md'), "[a](/images/a.png?v=2) [b](/blog) [ext](https://x.com/d.png)")
+        found = page_assets(os.path.join(self.content, 'links.md'), {'/images/a.png': '/images/a.1.png'})
+        self.assertEqual(found, {'/images/a.png': '/images/a.1.png', '/blog': '/blog'})
+
+    def test_page_assets_wrapped_onto_next_line(self):
+        self.write(os.path.join(self.content, 'wrapped.md'), "# Wrapped\n\n![wizard\nTom](/images/a.png) and [the\nblog](/blog)")
+        found = page_assets(os.path.join(self.content, 'wrapped.md'), {'/images/a.png': '/images/a.1.png'})
+        self.assertEqual(found, {'/images/a.png': '/images/a.1.png', '/blog': '/blog'})
+
+    def test_asset_url(self):
+        for path in (os.path.join(self.static, 'images', 'a.png'), os.path.join('images', 'a.png'), '/images/a.png'):
+            self.assertEqual(asset_url(path, self.static), '/images/a.png')
+
+    def test_dependents(self):
+        self.build()
+        blog = self.source('blog', 'index.md')
+        home = self.source('index.md')
+        self.assertEqual(dependents(self.manifest, os.path.join(self.static, 'images', 'b.png'), self.template, self.static), [blog])
+        self.assertEqual(dependents(self.manifest, home, self.template, self.static), [home])
+        self.assertEqual(dependents(self.manifest, self.template, self.template, self.static), [blog, home])
+        # The template links the stylesheet, so every page depends on it
+        self.assertEqual(dependents(self.manifest, '/index.css', self.template, self.static), [blog, home])
+        self.assertEqual(dependents(self.manifest, '/images/unused.png', self.template, self.static), [])
+
+    def test_graph(self):
+        self.build()
+        result = graph(self.manifest, self.template)
+        self.assertEqual(result['template']['assets'], ['/index.css'])
+        self.assertEqual(result['pages'][self.source('index.md')]['assets'], ['/images/a.png'])
+
+    def test_changed_asset_only_rebuilds_dependents(self):
+        self.build(fingerprint=True)
+        self.write(os.path.join(self.static, 'images', 'b.png'), "new b")
+        stats = self.build(fingerprint=True)
+        # The blog page got re-rendered, home was skipped without rendering
+        self.assertEqual((stats.written, stats.unchanged), (1, 1))
+        with open(os.path.join(self.docs, 'blog', 'index.html')) as src:
+            self.assertNotIn('/images/b.png"', src.read())
+
+    def test_linked_asset_is_a_dependency(self):
+        os.makedirs(os.path.join(self.content, 'about'))
+        about = self.source('about', 'index.md')
+        self.write(about, "# About\n\n[the photo](/images/b.png#full) and [blog](/blog)")
+        self.build(fingerprint=True)
+        self.assertIn(about, dependents(self.manifest, os.path.join(self.static, 'images', 'b.png'), self.template, self.static))
+
+        self.write(os.path.join(self.static, 'images', 'b.png'), "new b")
+        stats = self.build(fingerprint=True)
+        self.assertEqual((stats.written, stats.unchanged), (2, 1))
+        with open(os.path.join(self.docs, 'about', 'index.html')) as src:
+            html = src.read()
+        self.assertIn(self.manifest.pages[about]['assets']['/images/b.png'] + '#full', html)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, self.manifest.pages[about]['assets']['/images/b.png'][1:])))
+
+    def test_changed_stylesheet_rebuilds_everything(self):
+        self.build(fingerprint=True)
+        self.write(os.path.join(self.static, 'index.css'), "body { color: red }")
+        stats = self.build(fingerprint=True)
+        self.assertEqual(stats.written, 2)
+
+    def test_orphans(self):
+        self.build()
+        stray = os.path.join(self.docs, 'old', 'index.html')
+        os.makedirs(os.path.dirname(stray))
+        self.write(stray, "left over")
+        self.write(os.path.join(self.docs, 'index.html.gz'), "sibling")
+        self.manifest.compressed = ['index.html.gz']  # what --precompress would have recorded
+
+        self.assertEqual(find_orphans(self.manifest, self.docs), [os.path.normpath(stray)])
+        self.assertEqual(prune_orphans(self.manifest, self.docs), 1)
+        self.assertFalse(os.path.exists(os.path.dirname(stray)))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, 'index.html')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import io
+import pickle
+import unittest
+
+from src.flatdoc import FlatDocument
+from src.htmlnode import LeafNode, ParentNode
+from src.markdown_converter import markdown_to_document, markdown_to_html_node, configure_inline_cache
+from src.render_context import RenderContext
+
+MARKDOWN = """# Title with **bold**
+
+A paragraph with a [link](/about) and ![img](/images/a.png) and `code`.
+
+> quoted _text_
+
+- one
+- two
+
+1. first
+2. second
+
+```
+def x():
+    return '<b>'
+```
+"""
+
+
+class TestFlatDocument(unittest.TestCase):
+    def test_events_to_html(self):
+        doc = FlatDocument()
+        doc.open('div')
+        doc.open('p', {'class': 'x'})
+        doc.leaf(None, 'plain ')
+        doc.leaf('a', 'link', {'href': '/a'})
+        doc.leaf('img', '', {'alt': 'pic', 'src': '/i.png'})
+        doc.close()
+        doc.close()
+        self.assertEqual(doc.to_html(), '<div><p class="x">plain <a href="/a">link</a><img src="/i.png" alt="pic" /></p></div>')
+        self.assertEqual(len(doc), 7)
+
+    def test_unbalanced(self):
+        doc = FlatDocument()
+        with self.assertRaises(ValueError):
+            doc.close()
+        doc.open('div')
+        doc.leaf('b', 'x')
+        with self.assertRaises(ValueError):
+            doc.to_html()
+
+    def test_leaf_rules_match_leafnode(self):
+        doc = FlatDocument()
+        doc.open('div')
+        doc.leaf('table', 'x')
+        doc.close()
+        with self.assertRaises(TypeError):
+            doc.to_html()
+        with self.assertRaises(TypeError):
+            LeafNode('table', 'x').to_html()
+
+    def test_chunks_and_write(self):
+        doc = FlatDocument()
+        doc.open('ul')
+        for idx in range(100):
+            doc.leaf('li', str(idx))
+        doc.close()
+
+        chunks = list(doc.iter_html(chunk_events=10))
+        self.assertEqual(len(chunks), 11)
+        self.assertEqual(''.join(chunks), doc.to_html())
+
+        stream = io.StringIO()
+        doc.write_html(stream)
+        self.assertEqual(stream.getvalue(), doc.to_html())
+
+    def test_node_round_trip(self):
+        node = ParentNode('div', [
+            ParentNode('p', [LeafNode(None, 'a '), LeafNode('b', 'bold')]),
+            ParentNode('pre', [LeafNode('code', 'x')]),
+        ])
+        doc = FlatDocument.from_node(node)
+        self.assertEqual(doc.to_html(), node.to_html())
+        self.assertEqual(doc.to_node(), node)
+
+    def test_to_node_needs_one_root(self):
+        doc = FlatDocument()
+        doc.leaf('b', 'x')
+        doc.leaf('i', 'y')
+        with self.assertRaises(ValueError):
+            doc.to_node()
+
+    def test_pickles(self):
+        doc = markdown_to_document(MARKDOWN)
+        self.assertEqual(pickle.loads(pickle.dumps(doc)), doc)
+
+
+class TestMarkdownToDocument(unittest.TestCase):
+    def tearDown(self):
+        configure_inline_cache(0)
+
+    def test_same_as_tree(self):
+        for context in (None, RenderContext('/site'), RenderContext('/', {'/images/a.png': '/images/a.0123456789ab.png'})):
+            doc = markdown_to_document(MARKDOWN, context)
+            node = markdown_to_html_node(MARKDOWN, context)
+            self.assertEqual(doc.to_html(), node.to_html())
+            self.assertEqual(doc.to_node(), node)
+            self.assertEqual(FlatDocument.from_node(node), doc)
+
+    def test_same_with_inline_cache(self):
+        configure_inline_cache(64)
+        for _ in range(2):
+            self.assertEqual(markdown_to_document(MARKDOWN).to_html(), markdown_to_html_node(MARKDOWN).to_html())
+
+    def test_lines(self):
+        lines = io.StringIO(MARKDOWN)
+        self.assertEqual(markdown_to_document(lines).to_html(), markdown_to_html_node(MARKDOWN).to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
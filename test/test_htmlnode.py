@@ -1,6 +1,6 @@
 import unittest
 
-from src.htmlnode import HTMLNode
+from src.htmlnode import HTMLNode, LeafNode, ParentNode
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -37,6 +37,35 @@ class TestHTMLNode(unittest.TestCase):
         test_string = ''
         self.assertEqual(params, test_string)
 
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(HTMLNode(), '__dict__'))
+        self.assertFalse(hasattr(LeafNode('b', 'x'), '__dict__'))
+        self.assertFalse(hasattr(ParentNode('p', [LeafNode('b', 'x')]), '__dict__'))
+
+    def test_children_sequence_becomes_list(self):
+        child = LeafNode('b', 'x')
+        node = ParentNode('p', (child,))
+        self.assertEqual(node.children, [child])
+
+    def test_img_src_alt_first(self):
+        node = LeafNode('img', '', {'title': 't', 'alt': 'a', 'src': 's', 'class': 'c'})
+        self.assertEqual(node.props_to_html(), ' src="s" alt="a" class="c" title="t"')
+
+    def test_img_without_src_is_alphabetical(self):
+        node = LeafNode('img', '', {'title': 't', 'alt': 'a'})
+        self.assertEqual(node.props_to_html(), ' alt="a" title="t"')
+
+    def test_link_href_first(self):
+        node = LeafNode('a', 'x', {'target': '_blank', 'class': 'c', 'href': '/h'})
+        self.assertEqual(node.props_to_html(), ' href="/h" class="c" target="_blank"')
+
+    def test_props_cached_and_reset_on_assign(self):
+        node = LeafNode('a', 'x', {'href': '/one'})
+        first = node.props_to_html()
+        self.assertIs(node.props_to_html(), first)
+        node.props = {'href': '/two'}
+        self.assertEqual(node.props_to_html(), ' href="/two"')
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -169,6 +169,33 @@ class TestSplitImagesAndLinks(unittest.TestCase):
         self.assertEqual(new_nodes, expected)
 
 
+    # ----------- Stress -----------
+    def test_thousands_of_links_one_paragraph(self):
+        count = 5000
+        text = " and ".join(f"[l](https://x.com/{idx})" for idx in range(count))
+        new_nodes = split_nodes_link([TextNode(text, TextType.TEXT)])
+
+        links = [node for node in new_nodes if node.text_type == TextType.LINK]
+        self.assertEqual(len(links), count)
+        self.assertEqual(links[-1], TextNode("l", TextType.LINK, f"https://x.com/{count - 1}"))
+        self.assertEqual(len(new_nodes), count * 2 - 1)
+
+    def test_thousands_of_empty_alt_images(self):
+        count = 5000
+        text = "".join(f"![](https://x.com/{idx}.png)" for idx in range(count))
+        new_nodes = split_nodes_image([TextNode(text, TextType.TEXT)])
+
+        self.assertEqual(len(new_nodes), count)
+        self.assertEqual(new_nodes[1234], TextNode("", TextType.IMAGE, "https://x.com/1234.png"))
+
+    def test_repeated_text_before_link(self):
+        node = TextNode("l l l [l](https://a.com) l", TextType.TEXT)
+        self.assertEqual(split_nodes_link([node]), [
+            TextNode("l l l ", TextType.TEXT),
+            TextNode("l", TextType.LINK, "https://a.com"),
+            TextNode(" l", TextType.TEXT),
+        ])
+
     # def test_split_links_malformed_raises(self):
     #     node = TextNode("bad [link](https://a.com", TextType.TEXT)
     #     with self.assertRaises(ValueError):
@@ -0,0 +1,72 @@
+import random
+import unittest
+
+from src.markdown_converter import markdown_to_html_node, build_children, configure_inline_cache, inline_cache_info
+from src.markdown_helpers import BlockType
+from src.render_context import RenderContext
+from bench.corpus import generate_markdown
+
+DISCLAIMER = "Opinions are **mine**, see [the license](/license) and ![badge](/b.png)"
+
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        configure_inline_cache(0)
+
+    def test_off_by_default(self):
+        self.assertEqual(inline_cache_info()['maxsize'], 0)
+
+    def test_same_output(self):
+        md = generate_markdown(random.Random(12), 60)
+        expected = markdown_to_html_node(md).to_html()
+        configure_inline_cache(128)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+
+    def test_hits_and_misses(self):
+        configure_inline_cache(16)
+        md = f"# Page\n\n{DISCLAIMER}\n\nother\n\n{DISCLAIMER}"
+        markdown_to_html_node(md)
+        info = inline_cache_info()
+        self.assertEqual((info['hits'], info['misses']), (1, 3))
+
+    def test_keyed_by_block_type(self):
+        configure_inline_cache(16)
+        build_children("text", BlockType.PARAGRAPH)
+        build_children("text", BlockType.QUOTE)
+        self.assertEqual(inline_cache_info()['misses'], 2)
+
+    def test_keyed_by_context(self):
+        configure_inline_cache(16)
+        plain = build_children("[home](/)", BlockType.PARAGRAPH)
+        hosted = build_children("[home](/)", BlockType.PARAGRAPH, RenderContext('/site/'))
+        self.assertEqual(plain[0].props, {'href': '/'})
+        self.assertEqual(hosted[0].props, {'href': '/site/'})
+
+    def test_bounded(self):
+        configure_inline_cache(2)
+        for idx in range(10):
+            build_children(f"block {idx}", BlockType.PARAGRAPH)
+        self.assertEqual(inline_cache_info()['size'], 2)
+
+    def test_cached_nodes_are_fresh(self):
+        configure_inline_cache(16)
+        first = build_children(DISCLAIMER, BlockType.PARAGRAPH)
+        first[0].value = "changed"
+        link = [node for node in first if node.tag == 'a'][0]
+        link.props['href'] = '/changed'
+
+        second = build_children(DISCLAIMER, BlockType.PARAGRAPH)
+        self.assertIsNot(first[0], second[0])
+        self.assertEqual(second[0].value, "Opinions are ")
+        self.assertEqual([node for node in second if node.tag == 'a'][0].props, {'href': '/license'})
+
+    def test_errors_not_cached(self):
+        configure_inline_cache(16)
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                build_children("broken **bold", BlockType.PARAGRAPH)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import glob
+import os
+import unittest
+
+from src.textnode import TextNode, TextType
+from src.markdown_converter import text_to_text_blocks, pipeline_text_to_text_blocks
+from src.markdown_helpers import scan_inline, markdown_to_blocks, block_to_block_type, trim_md_chars, BlockType
+
+CONTENT_ROOT = os.path.join(os.path.dirname(__file__), '..', 'content')
+
+# Well formed text where the scanner and the old pipeline have to agree node for node
+SAMPLES = [
+    "Just plain text.",
+    "This is **bold** text.",
+    "This is _italic_ and `code` text.",
+    "**start** middle _end_",
+    "a****b",
+    "***a***",
+    "Hi **B** _I_ `C` [L](https://l.com) ![A](https://i.com/a.png) end",
+    "![one](https://x.com/1.png)![two](https://x.com/2.png)",
+    "[start](https://a.com) middle [end](https://b.com)",
+    "an ![](https://x.com/empty.png) alt",
+    "not [a link] and not ![an image] either",
+    "single * star and [half](link",
+    "same [x](https://a.com) text [x](https://b.com) twice",
+]
+
+
+class TestInlineScanner(unittest.TestCase):
+    def test_matches_pipeline(self):
+        for text in SAMPLES:
+            self.assertEqual(scan_inline(text), pipeline_text_to_text_blocks(text), text)
+
+    def test_matches_pipeline_on_site_content(self):
+        for path in glob.glob(os.path.join(CONTENT_ROOT, '**', '*.md'), recursive=True):
+            with open(path) as src:
+                blocks = markdown_to_blocks(src.read())
+            for block in blocks:
+                block_type = block_to_block_type(block)
+                if block_type == BlockType.CODE:
+                    continue
+                text = trim_md_chars(block, block_type)
+                self.assertEqual(scan_inline(text), pipeline_text_to_text_blocks(text), path)
+
+    def test_legacy_switch(self):
+        text = "a `x_y` b"
+        self.assertEqual(text_to_text_blocks(text), [
+            TextNode("a ", TextType.TEXT),
+            TextNode("x_y", TextType.CODE),
+            TextNode(" b", TextType.TEXT),
+        ])
+        # The old pipeline splits italics before code so it chokes on this
+        with self.assertRaises(ValueError):
+            text_to_text_blocks(text, legacy=True)
+
+    def test_underscore_in_url(self):
+        self.assertEqual(scan_inline("[x](https://a.com/some_path)"), [
+            TextNode("x", TextType.LINK, "https://a.com/some_path"),
+        ])
+
+    def test_unclosed_raises(self):
+        for text in ["**open", "_open", "`open", "fine **then** _not"]:
+            with self.assertRaises(ValueError):
+                scan_inline(text)
+
+    def test_empty_string(self):
+        self.assertEqual(scan_inline(""), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import contextlib
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from src import main as site_main
+
+TEMPLATE = '<html><head><title>{{ Title }}</title><link href="/index.css" /></head><body>{{ Content }}</body></html>'
+
+
+# End to end runs of main() in a throwaway site (content/, static/, template/ relative to the working directory)
+class TestMain(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        os.makedirs(os.path.join('content', 'contact'))
+        os.makedirs(os.path.join('static', 'images'))
+        os.makedirs('template')
+        os.makedirs('docs')
+        self.write(os.path.join('template', 'template.html'), TEMPLATE)
+        self.write(os.path.join('static', 'index.css'), "body {}")
+        self.write(os.path.join('static', 'images', 'tom.png'), "tom")
+        self.write(os.path.join('content', 'index.md'), "# Home\n\n![tom](/images/tom.png)")
+        self.write(os.path.join('content', 'contact', 'index.md'), "# Contact\n\nWrite to us")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as dest:
+            dest.write(text)
+
+    def run_main(self, *argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            site_main.main(list(argv))
+        return output.getvalue()
+
+    def test_no_manifest_mirrors_sources(self):
+        # docs/ is committed but .build/ isn't, so a fresh clone has outputs and no manifest
+        self.run_main()
+        self.assertTrue(os.path.exists(os.path.join('docs', 'contact', 'index.html')))
+        shutil.rmtree(site_main.BUILD_ROOT)
+        shutil.rmtree(os.path.join('content', 'contact'))
+        os.remove(os.path.join('static', 'images', 'tom.png'))
+
+        self.run_main()
+        self.assertFalse(os.path.exists(os.path.join('docs', 'contact')))
+        self.assertFalse(os.path.exists(os.path.join('docs', 'images', 'tom.png')))
+        self.assertTrue(os.path.exists(os.path.join('docs', 'index.html')))
+        self.assertTrue(os.path.exists(os.path.join('docs', 'index.css')))
+
+    def test_fingerprinted_rebuild_leaves_asset_manifest_alone(self):
+        self.run_main('--fingerprint-assets')
+        asset_manifest = os.path.join('docs', 'asset-manifest.json')
+        mtime = os.stat(asset_manifest).st_mtime_ns
+        output = self.run_main('--fingerprint-assets')
+        static_line = next(line for line in output.splitlines() if line.startswith("Static files"))
+        self.assertIn("0 removed", static_line)
+        self.assertEqual(os.stat(asset_manifest).st_mtime_ns, mtime)
+
+        # Turning fingerprinting off still prunes it
+        self.run_main()
+        self.assertFalse(os.path.exists(asset_manifest))
+
+    def test_precompress_leaves_static_archives_and_cleans_up_when_off(self):
+        self.write(os.path.join('static', 'data.json'), '{"a": 1}' * 100)
+        with gzip.open(os.path.join('static', 'data.json.gz'), 'wt') as dest:
+            dest.write('{"from": "static"}')
+        self.write(os.path.join('content', 'index.md'), "# Home\n\n" + "Some words about tom. " * 40)
+
+        for _ in range(2):
+            self.run_main('--precompress', 'gz')
+            with gzip.open(os.path.join('docs', 'data.json.gz'), 'rt') as src:
+                self.assertEqual(src.read(), '{"from": "static"}')
+        self.assertTrue(os.path.exists(os.path.join('docs', 'index.html.gz')))
+
+        # Without --precompress the old siblings would be serving stale pages
+        self.run_main()
+        self.assertFalse(os.path.exists(os.path.join('docs', 'index.html.gz')))
+        self.assertTrue(os.path.exists(os.path.join('docs', 'data.json.gz')))
+
+    def test_dependents_uses_the_built_base_path(self):
+        self.run_main('/site')
+        output = self.run_main('--dependents', os.path.join('static', 'images', 'tom.png'))
+        self.assertIn("1 page(s)", output)
+
+        errors = io.StringIO()
+        with contextlib.redirect_stderr(errors):
+            output = self.run_main('/other', '--dependents', os.path.join('static', 'images', 'tom.png'))
+        self.assertIn("0 page(s)", output)
+        self.assertIn("base path /site/", errors.getvalue())
+
+    def test_in_flight_does_not_eat_base_path(self):
+        args = site_main.parse_args(['--in-flight', '8', '/base'])
+        self.assertEqual((args.in_flight, args.base_path), (8, '/base'))
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            site_main.parse_args(['--in-flight', '/base'])
+
+    def test_cprofile_turns_off_in_flight(self):
+        # cProfile only sees this process, so the pipeline's threads and workers mustn't do the build
+        with mock.patch.object(site_main, 'Pipeline') as pipeline:
+            output = self.run_main('--cprofile', 'build.prof', '--in-flight', '4', '--jobs', '4')
+        pipeline.assert_not_called()
+        self.assertIn("cProfile stats written to build.prof", output)
+        self.assertTrue(os.path.exists(os.path.join('docs', 'index.html')))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
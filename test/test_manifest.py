@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from src.manifest import BuildManifest, hash_file
+from src.main import generate_pages_recursive
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.docs = os.path.join(root, 'docs')
+        self.template = os.path.join(root, 'template.html')
+        self.manifest_path = os.path.join(root, '.build', 'manifest.json')
+
+        os.makedirs(os.path.join(self.content, 'blog'))
+        self.write(self.template, TEMPLATE)
+        self.write(os.path.join(self.content, 'index.md'), "# Home\n\nhello")
+        self.write(os.path.join(self.content, 'blog', 'index.md'), "# Blog\n\nposts")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as dest:
+            dest.write(text)
+
+    def build(self):
+        manifest = BuildManifest.load(self.manifest_path, '/')
+        generate_pages_recursive(self.content, self.template, self.docs, '/', manifest)
+        manifest.save()
+        return manifest
+
+    def test_first_build_records_pages(self):
+        manifest = self.build()
+        self.assertEqual(len(manifest.pages), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, 'blog', 'index.html')))
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        output = os.path.join(self.docs, 'index.html')
+        os.utime(output, (0, 0))
+        self.build()
+        self.assertEqual(os.stat(output).st_mtime, 0)
+
+    def test_changed_source_rebuilds(self):
+        self.build()
+        self.write(os.path.join(self.content, 'index.md'), "# Home\n\nchanged")
+        self.build()
+        with open(os.path.join(self.docs, 'index.html')) as src:
+            self.assertIn('changed', src.read())
+
+    def test_changed_template_rebuilds(self):
+        self.build()
+        self.write(self.template, "<main>{{ Title }}{{ Content }}</main>")
+        self.build()
+        with open(os.path.join(self.docs, 'blog', 'index.html')) as src:
+            self.assertTrue(src.read().startswith('<main>'))
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, 'blog', 'index.md'))
+        manifest = self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, 'blog')))
+        self.assertEqual(len(manifest.pages), 1)
+
+    def test_identical_rerender_not_rewritten(self):
+        # No manifest, so every page renders again, but nothing that came out the same gets touched
+        generate_pages_recursive(self.content, self.template, self.docs, '/')
+        output = os.path.join(self.docs, 'index.html')
+        os.utime(output, (0, 0))
+        stats = generate_pages_recursive(self.content, self.template, self.docs, '/')
+        self.assertEqual((stats.written, stats.unchanged), (0, 2))
+        self.assertEqual(os.stat(output).st_mtime, 0)
+
+    def test_stats_count_removed(self):
+        self.build()
+        os.remove(os.path.join(self.content, 'blog', 'index.md'))
+        manifest = BuildManifest.load(self.manifest_path, '/')
+        stats = generate_pages_recursive(self.content, self.template, self.docs, '/', manifest)
+        self.assertEqual((stats.written, stats.unchanged, stats.removed), (0, 1, 1))
+
+    def test_base_path_change_resets(self):
+        self.build()
+        manifest = BuildManifest.load(self.manifest_path, '/other/')
+        self.assertEqual(manifest.pages, {})
+        self.assertEqual(manifest.discarded_base_path, '/')
+
+    def test_load_any_base_path(self):
+        self.build()
+        manifest = BuildManifest.load(self.manifest_path, None)
+        self.assertEqual((manifest.base_path, manifest.discarded_base_path), ('/', None))
+        self.assertEqual(len(manifest.pages), 2)
+
+    def test_tampered_output_rebuilds(self):
+        manifest = self.build()
+        output = os.path.join(self.docs, 'index.html')
+        self.write(output, "junk")
+        self.assertFalse(manifest.is_fresh(
+            os.path.join(self.content, 'index.md'),
+            hash_file(os.path.join(self.content, 'index.md')),
+            hash_file(self.template),
+            output))
+
+
+if __name__ == "__main__":
+    unittest.main()
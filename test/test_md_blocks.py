@@ -1,6 +1,8 @@
+import random
 import unittest
 
 from src.markdown_helpers import *
+from bench.corpus import generate_markdown
 
 
 
@@ -360,6 +362,107 @@ This is Bad quote
         with self.assertRaises(ValueError):
             block_to_block_type(md)
 
+    # ---------- classify_block ----------
+    def test_classify_block_lines_and_level(self):
+        self.assertEqual(classify_block("### Three"), (BlockType.HEADER, None, 3))
+        self.assertEqual(classify_block("- a\n- b"), (BlockType.UNORDERED_LIST, ["- a", "- b"], 0))
+        self.assertEqual(classify_block("1. a\n2. b"), (BlockType.ORDERED_LIST, ["1. a", "2. b"], 0))
+        self.assertEqual(classify_block("> a\n> b"), (BlockType.QUOTE, None, 0))
+        self.assertEqual(classify_block("```\nx\n```"), (BlockType.CODE, None, 0))
+        self.assertEqual(classify_block("plain"), (BlockType.PARAGRAPH, None, 0))
+
+    def test_classify_block_header_rules(self):
+        self.assertEqual(classify_block("###### Six")[2], 6)
+        for md in ("#######  Seven", "#", "######", "##No space"):
+            with self.assertRaises(ValueError):
+                classify_block(md)
+
+    def test_classify_block_matches_validators(self):
+        # Everything the corpus generator makes plus the malformed cases, against the original validators
+        blocks = markdown_to_blocks(generate_markdown(random.Random(7), 500))
+        blocks += ["> a\nb", ">\n>", "- a\n-b", "1. a\n3. c", "2. b", "1. a\n2.b", "```\nx", "```\nx\n``` y", "-x"]
+        for block in blocks:
+            validator = VALIDATOR[block_to_block_type_by_prefix(block)]
+            try:
+                expected = validator(block)
+            except ValueError:
+                with self.assertRaises(ValueError, msg=block):
+                    classify_block(block)
+                continue
+
+            block_type, lines, level = classify_block(block)
+            self.assertEqual(block_type, expected, block)
+            self.assertEqual(trim_md_chars(block, block_type, lines, level), trim_md_chars(block, block_type), block)
+
+
+# The validators block_to_block_type used to run, classify_block has to agree with them
+def markdown_header_validator(markdown):
+    if len(markdown) < 2:
+        raise ValueError("Malformed Header Block")
+    current_char = 0
+
+    while markdown[current_char] == '#':
+        current_char += 1
+    if current_char > 6 or markdown[current_char] != ' ':
+        raise ValueError("Malformed Header Block")
+    return BlockType.HEADER
+
+def markdown_code_validator(markdown):
+    if not markdown.endswith('```'):
+        raise ValueError("Malformed Code Block")
+    return BlockType.CODE
+
+def markdown_quote_validator(markdown):
+    lines = markdown.split('\n')
+    for line in lines:
+        if not line.startswith('>'):
+            raise ValueError("Malformed Quote Block")
+    return BlockType.QUOTE
+
+def markdown_unordered_list_validator(markdown):
+    lines = markdown.split('\n')
+    for line in lines:
+        if not line.startswith('- '):
+            raise ValueError("Malformed Unordered List Block")
+    return BlockType.UNORDERED_LIST
+
+def markdown_ordered_list_validator(markdown):
+    previous_digit = 0
+    lines = markdown.split('\n')
+    for line in lines:
+        if len(line) <= 2 or not line[0].isdigit() or not line[1] == '.' or not line[2] == ' ':
+            raise ValueError("Malformed Ordered List Block")
+        current_digit = int(line[0])
+        if previous_digit + 1 != current_digit:
+            raise ValueError("Malformed Ordered List Block")
+        previous_digit = current_digit
+    return BlockType.ORDERED_LIST
+
+
+VALIDATOR = {
+    BlockType.HEADER: markdown_header_validator,
+    BlockType.QUOTE: markdown_quote_validator,
+    BlockType.CODE: markdown_code_validator,
+    BlockType.UNORDERED_LIST: markdown_unordered_list_validator,
+    BlockType.ORDERED_LIST: markdown_ordered_list_validator,
+    BlockType.PARAGRAPH: lambda _: BlockType.PARAGRAPH,
+}
+
+
+def block_to_block_type_by_prefix(markdown):
+    # The dispatch block_to_block_type used to do before running a validator
+    if markdown[0] == '#':
+        return BlockType.HEADER
+    if markdown[0] == '>':
+        return BlockType.QUOTE
+    if markdown[0] == '-':
+        return BlockType.UNORDERED_LIST
+    if markdown[0].isdigit():
+        return BlockType.ORDERED_LIST
+    if markdown.startswith('```'):
+        return BlockType.CODE
+    return BlockType.PARAGRAPH
+
 
 if __name__ == "__main__":
     unittest.main()
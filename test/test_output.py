@@ -0,0 +1,73 @@
+import os
+import stat
+import tempfile
+import unittest
+
+from src.output import AtomicOutput, OutputStats, write_output
+from src.manifest import hash_bytes
+
+
+class TestAtomicOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'index.html')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def temp_files(self):
+        return [name for name in os.listdir(self.tmp.name) if name.startswith('.tmp-')]
+
+    def test_new_file_written(self):
+        result = write_output(self.path, "<p>hi</p>")
+        self.assertTrue(result.written)
+        self.assertEqual(result.hash, hash_bytes(b"<p>hi</p>"))
+        with open(self.path) as src:
+            self.assertEqual(src.read(), "<p>hi</p>")
+
+    def test_identical_output_left_alone(self):
+        write_output(self.path, "<p>hi</p>")
+        os.utime(self.path, ns=(0, 1_000_000_000))
+        result = write_output(self.path, "<p>hi</p>")
+        self.assertFalse(result.written)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1_000_000_000)
+        self.assertEqual(self.temp_files(), [])
+
+    def test_same_size_different_content(self):
+        write_output(self.path, "<p>aa</p>")
+        self.assertTrue(write_output(self.path, "<p>bb</p>").written)
+        with open(self.path) as src:
+            self.assertEqual(src.read(), "<p>bb</p>")
+
+    def test_streamed_chunks(self):
+        with AtomicOutput(self.path) as dest:
+            for chunk in ("<div>", "<p>héllo</p>", "</div>"):
+                dest.write(chunk)
+        self.assertEqual(dest.result.hash, hash_bytes("<div><p>héllo</p></div>".encode('utf-8')))
+
+    def test_error_keeps_old_file(self):
+        write_output(self.path, "old")
+        with self.assertRaises(RuntimeError):
+            with AtomicOutput(self.path) as dest:
+                dest.write("half a ")
+                raise RuntimeError("render blew up")
+        with open(self.path) as src:
+            self.assertEqual(src.read(), "old")
+        self.assertEqual(self.temp_files(), [])
+
+    def test_permissions_follow_umask(self):
+        write_output(self.path, "x")
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o666 & ~umask)
+
+    def test_stats(self):
+        stats = OutputStats()
+        stats.add(write_output(self.path, "a"))
+        stats.add(write_output(self.path, "a"))
+        self.assertEqual((stats.written, stats.unchanged), (1, 1))
+        self.assertEqual(stats.bytes, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+from src.parallel import run_parallel, run_serial, run_threaded, resolve_jobs, make_dirs, format_rate
+from src.main import generate_pages_recursive
+
+
+def square_or_fail(n):
+    if n < 0:
+        raise ValueError("negative")
+    return n * n
+
+
+class TestParallel(unittest.TestCase):
+    def test_serial_results_in_order(self):
+        results = list(run_serial(square_or_fail, [(1,), (2,), (3,)]))
+        self.assertEqual(results, [(True, 1), (True, 4), (True, 9)])
+
+    def test_parallel_matches_serial(self):
+        work = [(n,) for n in range(20)]
+        self.assertEqual(list(run_parallel(square_or_fail, work, 4)), list(run_serial(square_or_fail, work)))
+
+    def test_errors_are_reported_per_item(self):
+        results = list(run_parallel(square_or_fail, [(2,), (-1,), (3,)], 2))
+        self.assertEqual(results[0], (True, 4))
+        self.assertFalse(results[1][0])
+        self.assertIsInstance(results[1][1], ValueError)
+        self.assertEqual(results[2], (True, 9))
+
+    def test_threaded_matches_serial(self):
+        work = [(n,) for n in range(20)] + [(-1,)]
+        threaded = run_threaded(square_or_fail, work, 4)
+        self.assertEqual(threaded[:20], list(run_serial(square_or_fail, work))[:20])
+        self.assertFalse(threaded[20][0])
+        self.assertIsInstance(threaded[20][1], ValueError)
+
+    def test_make_dirs(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = [os.path.join(root, 'a', 'b'), os.path.join(root, 'a'), os.path.join(root, 'c', 'd'), os.path.join(root, 'a', 'b')]
+            make_dirs(paths)
+            self.assertTrue(all(os.path.isdir(path) for path in paths))
+
+    def test_format_rate(self):
+        self.assertEqual(format_rate(100, 50 << 20, 2.0), "50 files/s, 25.0 MB/s")
+        self.assertEqual(format_rate(0, 0, 0.0), "0 file(s), 0.0 MB")
+
+    def test_resolve_jobs(self):
+        self.assertEqual(resolve_jobs(3), 3)
+        self.assertGreaterEqual(resolve_jobs(0), 1)
+
+
+class TestParallelBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.docs = os.path.join(root, 'docs')
+        self.template = os.path.join(root, 'template.html')
+        with open(self.template, 'w') as dest:
+            dest.write("<title>{{ Title }}</title>{{ Content }}")
+        for idx in range(6):
+            os.makedirs(os.path.join(self.content, f'page{idx}'))
+            with open(os.path.join(self.content, f'page{idx}', 'index.md'), 'w') as dest:
+                dest.write(f"# Page {idx}\n\nSome **text** for page {idx}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_outputs(self):
+        outputs = {}
+        for idx in range(6):
+            path = os.path.join(self.docs, f'page{idx}', 'index.html')
+            if os.path.exists(path):
+                with open(path) as src:
+                    outputs[idx] = src.read()
+        return outputs
+
+    def test_parallel_output_matches_serial(self):
+        generate_pages_recursive(self.content, self.template, self.docs, '/', None, 1)
+        serial = self.read_outputs()
+        generate_pages_recursive(self.content, self.template, self.docs, '/', None, 3)
+        self.assertEqual(self.read_outputs(), serial)
+        self.assertEqual(len(serial), 6)
+
+    def test_bad_page_reported_others_built(self):
+        with open(os.path.join(self.content, 'page2', 'index.md'), 'w') as dest:
+            dest.write("# Broken\n\nunclosed **bold")
+        with self.assertRaises(RuntimeError) as ctx:
+            generate_pages_recursive(self.content, self.template, self.docs, '/', None, 3)
+        self.assertIn('page2', str(ctx.exception))
+        self.assertEqual(sorted(self.read_outputs()), [0, 1, 3, 4, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
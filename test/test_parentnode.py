@@ -1,3 +1,5 @@
+import io
+import sys
 import unittest
 
 from src.htmlnode import LeafNode, ParentNode
@@ -93,6 +95,41 @@ class TestHTMLNode(unittest.TestCase):
         )
         self.assertEqual(node.to_html(), '<div id="main"><span>child</span></div>')
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "a "), LeafNode("a", "link", {"href": "/x"})]),
+            LeafNode("img", "", {"src": "/y.png", "alt": "y"}),
+        ])
+        chunks = list(node.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), node.to_html())
+
+    def test_deep_tree_past_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 5
+        node = ParentNode("p", [LeafNode("b", "bottom")])
+        for _ in range(depth):
+            node = ParentNode("blockquote", [node])
+        expected = "<blockquote>" * depth + "<p><b>bottom</b></p>" + "</blockquote>" * depth
+        self.assertEqual(node.to_html(), expected)
+        self.assertEqual("".join(node.iter_html()), expected)
+
+    def test_siblings_after_nested_parent(self):
+        node = ParentNode("div", [
+            LeafNode(None, "before "),
+            ParentNode("ul", [ParentNode("li", [LeafNode("i", "deep")]), LeafNode("li", "flat")], {"class": "x"}),
+            LeafNode("b", "after"),
+            ParentNode("p", [LeafNode(None, "last")]),
+        ])
+        self.assertEqual(
+            node.to_html(),
+            '<div>before <ul class="x"><li><i>deep</i></li><li>flat</li></ul><b>after</b><p>last</p></div>',
+        )
+
+    def test_write_html(self):
+        node = ParentNode("div", [ParentNode("span", [LeafNode("b", "bold")])])
+        stream = io.StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), node.to_html())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+from src import parse_cache
+from src.parse_cache import ParseCache
+from src.main import page_content
+from src.markdown_converter import markdown_to_html_node
+
+
+def hammer(root, worker):
+    # Every process writes and reads the same handful of keys with a tiny cap so eviction races too
+    cache = ParseCache(root, 2000)
+    for idx in range(50):
+        key = cache.key(f"block {idx % 10}")
+        cache.put(key, f"<p>{idx % 10}</p>" * 20)
+        html = cache.get(key)
+        if html is not None and html != f"<p>{idx % 10}</p>" * 20:
+            return False
+    return True
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'cache')
+
+    def tearDown(self):
+        parse_cache.configure(None)
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        cache = ParseCache(self.root)
+        key = cache.key("# hi")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "<h1>hi</h1>")
+        self.assertEqual(cache.get(key), "<h1>hi</h1>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_fingerprint_covers_render_path(self):
+        # Everything that shapes a cached fragment: parsing, node building, serializing and url rewriting
+        for name in ('markdown_converter.py', 'markdown_helpers.py', 'htmlnode.py', 'textnode.py', 'flatdoc.py', 'render_context.py'):
+            self.assertIn(name, parse_cache.PARSER_SOURCES)
+
+    def test_shared_between_instances(self):
+        first = ParseCache(self.root)
+        first.put(first.key("text"), "<p>text</p>")
+        second = ParseCache(self.root)
+        self.assertEqual(second.get(second.key("text")), "<p>text</p>")
+
+    def test_key_depends_on_markdown_and_extra(self):
+        cache = ParseCache(self.root)
+        self.assertNotEqual(cache.key("a"), cache.key("b"))
+        self.assertNotEqual(cache.key("a"), cache.key("a", "/base/"))
+        self.assertEqual(cache.key("a"), cache.key("a"))
+
+    def test_evicts_least_recently_used(self):
+        cache = ParseCache(self.root, 350)
+        keys = [cache.key(str(idx)) for idx in range(3)]
+        for offset, key in enumerate(keys):
+            cache.put(key, "x" * 100)
+            os.utime(cache.path_for(key), ns=(0, (offset + 1) * 1_000_000_000))
+        # Touch the oldest so the middle one is now least recently used
+        cache.get(keys[0])
+        cache.put(cache.key("new"), "x" * 100)
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+
+    def disk_bytes(self):
+        return sum(os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(self.root) for name in names)
+
+    def test_cap_holds_across_processes(self):
+        # Like 8 pool workers, each with its own ParseCache on the same directory
+        workers = [ParseCache(self.root, 100_000) for _ in range(8)]
+        for idx in range(90):
+            for worker, cache in enumerate(workers):
+                cache.put(cache.key(f"{worker} {idx}"), "x" * 1000)
+        # Each worker only ever goes CHECK_EVERY of the cap without recounting
+        self.assertLessEqual(self.disk_bytes(), 100_000 * (1 + parse_cache.CHECK_EVERY * len(workers)))
+        # and the build's own pass at the end gets it back under
+        ParseCache(self.root, 100_000).evict()
+        self.assertLessEqual(self.disk_bytes(), 100_000)
+
+    def test_start_does_not_walk(self):
+        ParseCache(self.root).put(ParseCache(self.root).key("a"), "<p>a</p>")
+        with mock.patch('os.walk') as walk:
+            ParseCache(self.root)
+        walk.assert_not_called()
+
+    def test_concurrent_processes(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(hammer, [self.root] * 4, range(4)))
+        self.assertTrue(all(results))
+        leftovers = [name for _, _, names in os.walk(self.root) for name in names if name.startswith('.tmp-')]
+        self.assertEqual(leftovers, [])
+
+    def test_page_content_uses_cache(self):
+        parse_cache.configure(self.root)
+        md = "# Title\n\nsome **bold** text"
+        first = page_content(md)
+        second = page_content(md)
+        self.assertEqual(first, markdown_to_html_node(md).to_html())
+        self.assertEqual(second, first)
+        self.assertEqual(parse_cache.ACTIVE.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
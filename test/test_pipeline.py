@@ -0,0 +1,134 @@
+import os
+import random
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src import main as site_main
+from src.pipeline import Pipeline
+from src.main import generate_pages_recursive
+from bench.corpus import generate_markdown
+
+
+def double(n, data):
+    if n == 3:
+        raise ValueError("render blew up")
+    return data * 2
+
+
+class Tracker():
+    # Counts pages between the start of their read and the end of their write
+    def __init__(self, failures=True):
+        self.failures = failures
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def read(self, n):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(0.005)
+        if self.failures and n == 5:
+            raise OSError("read failed")
+        return n
+
+    def write(self, n, rendered):
+        time.sleep(0.005)
+        with self.lock:
+            self.current -= 1
+        if self.failures and n == 7:
+            raise OSError("disk full")
+        return rendered
+
+
+class TestPipeline(unittest.TestCase):
+    def test_results_in_order_with_failures(self):
+        tracker = Tracker()
+        results = Pipeline(tracker.read, double, tracker.write, in_flight=4).run([(n,) for n in range(20)])
+        for n, (ok, result) in enumerate(results):
+            if n in (3, 5, 7):
+                self.assertFalse(ok)
+                self.assertIsInstance(result, Exception)
+            else:
+                self.assertEqual((ok, result), (True, n * 2))
+
+    def test_in_flight_limit(self):
+        tracker = Tracker(failures=False)
+        Pipeline(tracker.read, lambda n, data: data, tracker.write, in_flight=3, io_workers=8).run([(n,) for n in range(40)])
+        self.assertLessEqual(tracker.peak, 3)
+        self.assertGreater(tracker.peak, 1)
+
+    def test_io_overlaps(self):
+        # Counts reads / writes running at the same time instead of timing anything, a loaded machine can't fail it
+        lock = threading.Lock()
+        busy = [0, 0]  # current, peak
+
+        def io(result):
+            with lock:
+                busy[0] += 1
+                busy[1] = max(busy[1], busy[0])
+            time.sleep(0.01)
+            with lock:
+                busy[0] -= 1
+            return result
+
+        results = Pipeline(lambda n: io(n), lambda n, data: data, lambda n, rendered: io(rendered),
+                           in_flight=16, io_workers=4).run([(n,) for n in range(16)])
+        self.assertEqual([result for _, result in results], list(range(16)))
+        self.assertGreater(busy[1], 1)
+        self.assertLessEqual(busy[1], 4)
+
+    def test_process_render(self):
+        results = Pipeline(lambda n: n, double, lambda n, rendered: rendered, jobs=2).run([(n,) for n in range(6)])
+        self.assertEqual([ok for ok, _ in results], [True, True, True, False, True, True])
+
+    def test_empty(self):
+        self.assertEqual(Pipeline(None, None, None).run([]), [])
+
+
+class TestPipelineBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.template = os.path.join(root, 'template.html')
+        with open(self.template, 'w') as dest:
+            dest.write('<title>{{ Title }}</title><link href="/index.css" />{{ Content }}')
+        rng = random.Random(3)
+        for idx in range(8):
+            os.makedirs(os.path.join(self.content, f'page{idx}'))
+            with open(os.path.join(self.content, f'page{idx}', 'index.md'), 'w') as dest:
+                dest.write(generate_markdown(rng, 20))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, name, jobs=1, in_flight=0):
+        docs = os.path.join(self.tmp.name, name)
+        stats = generate_pages_recursive(self.content, self.template, docs, '/site/', None, jobs, None, in_flight)
+        outputs = {}
+        for dir_path, _, names in os.walk(docs):
+            for file_name in names:
+                path = os.path.join(dir_path, file_name)
+                with open(path) as src:
+                    outputs[os.path.relpath(path, docs)] = src.read()
+        return stats, outputs
+
+    def test_matches_normal_build(self):
+        _, expected = self.build('normal')
+        stats, piped = self.build('piped', jobs=2, in_flight=4)
+        self.assertEqual(piped, expected)
+        self.assertEqual(stats.written, 8)
+
+    def test_large_pages_stream(self):
+        _, expected = self.build('normal')
+        with mock.patch.object(site_main, 'STREAM_THRESHOLD', 100):
+            _, piped = self.build('piped', in_flight=2)
+        self.assertEqual(piped, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
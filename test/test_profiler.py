@@ -0,0 +1,63 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from src import profiler
+from src.profiler import BuildProfiler, STAGES
+from src.main import generate_pages_recursive
+
+
+class TestProfiler(unittest.TestCase):
+    def tearDown(self):
+        profiler.ACTIVE = None
+
+    def test_disabled_is_noop(self):
+        self.assertIs(profiler.stage('read'), profiler.NULL_STAGE)
+        with profiler.stage('read'):
+            pass
+
+    def test_stage_counts(self):
+        prof = BuildProfiler()
+        with prof.page('a.md'):
+            with prof.stage('read'):
+                pass
+            with prof.stage('read'):
+                pass
+        report = prof.report()
+        self.assertEqual(report['stages']['read']['calls'], 2)
+        self.assertEqual(report['pages']['a.md']['stages']['read']['calls'], 2)
+
+    def test_stages_outside_page_only_count_in_totals(self):
+        prof = BuildProfiler()
+        with prof.stage('write'):
+            pass
+        self.assertEqual(prof.report()['pages'], {})
+        self.assertEqual(prof.report()['stages']['write']['calls'], 1)
+
+    def test_profiled_build(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, 'content')
+            os.makedirs(content)
+            template = os.path.join(root, 'template.html')
+            with open(template, 'w') as dest:
+                dest.write("{{ Title }}{{ Content }}")
+            for name in ('one', 'two'):
+                os.makedirs(os.path.join(content, name))
+                with open(os.path.join(content, name, 'index.md'), 'w') as dest:
+                    dest.write(f"# {name}\n\nsome **text** and [a link](/x)\n\n- a\n- b\n\n```\ncode\n```")
+
+            profiler.ACTIVE = BuildProfiler()
+            with redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content, template, os.path.join(root, 'docs'), '/', None, 4)
+            report = profiler.ACTIVE.report()
+            summary = profiler.ACTIVE.summary()
+
+        self.assertEqual(list(report['stages']), list(STAGES))
+        self.assertEqual(len(report['pages']), 2)
+        self.assertIn('Slowest pages', summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from src.render_context import RenderContext, extract_root_urls
+from src.htmlnode import link_leaf, image_leaf
+from src.textnode import TextNode, TextType
+from src.markdown_converter import markdown_to_html_node
+
+
+class TestRenderContext(unittest.TestCase):
+    def test_url(self):
+        context = RenderContext('/site/')
+        self.assertEqual(context.url('/blog/tom'), '/site/blog/tom')
+        self.assertEqual(context.url('/'), '/site/')
+
+    def test_url_leaves_others_alone(self):
+        context = RenderContext('/site/')
+        for url in ('https://boot.dev', '//cdn.example.com/a.js', '#top', 'images/a.png', 'mailto:a@b.c'):
+            self.assertEqual(context.url(url), url)
+
+    def test_root_base_path(self):
+        self.assertEqual(RenderContext().url('/blog'), '/blog')
+
+    def test_trailing_slash_added(self):
+        self.assertEqual(RenderContext('/site').url('/a'), '/site/a')
+
+    def test_equal_and_hashable(self):
+        self.assertEqual(RenderContext('/site/'), RenderContext('/site'))
+        self.assertEqual(len({RenderContext('/a/'), RenderContext('/a/'), RenderContext('/b/')}), 2)
+
+    def test_leaves(self):
+        context = RenderContext('/site/')
+        link = link_leaf(TextNode('home', TextType.LINK, '/'), context)
+        image = image_leaf(TextNode('pic', TextType.IMAGE, '/images/a.png'), context)
+        self.assertEqual(link.to_html(), '<a href="/site/">home</a>')
+        self.assertEqual(image.to_html(), '<img src="/site/images/a.png" alt="pic" />')
+
+    def test_code_and_prose_untouched(self):
+        md = 'Write `<a href="/x">` like so, src="/y" [home](/)\n\n```\n<img src="/z.png" />\n```'
+        html = markdown_to_html_node(md, RenderContext('/site/')).to_html()
+        self.assertIn('<a href="/site/">home</a>', html)
+        self.assertIn('src="/y"', html)
+        self.assertIn('<img src="/z.png" />', html)
+        self.assertIn('<a href="/x">', html)
+
+    def test_extract_root_urls(self):
+        md = '![tom](/images/tom.png?v=1) [home](/#top) [boot](https://boot.dev) ![cdn](//cdn.example.com/a.png) [rel](a.html)'
+        self.assertEqual(extract_root_urls(md), ['/images/tom.png', '/'])
+
+    def test_scoped_ignores_other_assets(self):
+        # A new name for some image the page doesn't use mustn't change its cache keys
+        md = '![tom](/images/tom.png)'
+        before = RenderContext('/', {'/images/tom.png': '/images/tom.1.png', '/index.css': '/index.1.css'})
+        after = RenderContext('/', {'/images/tom.png': '/images/tom.1.png', '/index.css': '/index.2.css'})
+        self.assertEqual(before.scoped(md).key(), after.scoped(md).key())
+        self.assertEqual(markdown_to_html_node(md, before.scoped(md)).to_html(), markdown_to_html_node(md, before).to_html())
+
+        renamed = RenderContext('/', {'/images/tom.png': '/images/tom.2.png', '/index.css': '/index.1.css'})
+        self.assertNotEqual(before.scoped(md).key(), renamed.scoped(md).key())
+
+    def test_scoped_without_assets_is_itself(self):
+        context = RenderContext('/site/')
+        self.assertIs(context.scoped('![tom](/images/tom.png)'), context)
+
+    def test_no_context_is_unchanged(self):
+        md = '[home](/) ![a](/a.png)'
+        self.assertEqual(markdown_to_html_node(md).to_html(), markdown_to_html_node(md, RenderContext()).to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+
+from src.static_sync import sync_tree, files_match, list_files
+
+
+class TestStaticSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, 'static')
+        self.docs = os.path.join(self.tmp.name, 'docs')
+        os.makedirs(os.path.join(self.static, 'images'))
+        os.makedirs(self.docs)
+        self.write(os.path.join(self.static, 'index.css'), "body {}")
+        self.write(os.path.join(self.static, 'images', 'a.png'), "png bytes")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as dest:
+            dest.write(text)
+
+    def read(self, path):
+        with open(path) as src:
+            return src.read()
+
+    def test_list_files(self):
+        self.assertEqual(list_files(self.static), ['index.css', os.path.join('images', 'a.png')])
+
+    def test_threaded_sync_many_files(self):
+        for idx in range(50):
+            os.makedirs(os.path.join(self.static, f'dir{idx % 7}'), exist_ok=True)
+            self.write(os.path.join(self.static, f'dir{idx % 7}', f'{idx}.txt'), f"file {idx}")
+
+        stats, synced = sync_tree(self.static, self.docs, workers=8)
+        self.assertEqual(stats.copied, 52)
+        self.assertEqual(stats.bytes, sum(os.path.getsize(os.path.join(self.static, rel_path)) for rel_path in synced))
+        self.assertEqual(self.read(os.path.join(self.docs, 'dir3', '10.txt')), "file 10")
+
+        stats, _ = sync_tree(self.static, self.docs, synced, workers=8)
+        self.assertEqual((stats.copied, stats.skipped), (0, 52))
+
+    def test_first_sync_copies_everything(self):
+        stats, synced = sync_tree(self.static, self.docs)
+        self.assertEqual((stats.copied, stats.skipped, stats.removed), (2, 0, 0))
+        self.assertEqual(self.read(os.path.join(self.docs, 'images', 'a.png')), "png bytes")
+        self.assertEqual(len(synced), 2)
+
+    def test_second_sync_skips(self):
+        sync_tree(self.static, self.docs)
+        stats, _ = sync_tree(self.static, self.docs)
+        self.assertEqual((stats.copied, stats.skipped), (0, 2))
+
+    def test_changed_file_copied(self):
+        sync_tree(self.static, self.docs)
+        self.write(os.path.join(self.static, 'index.css'), "body { color: red }")
+        stats, _ = sync_tree(self.static, self.docs)
+        self.assertEqual(stats.copied, 1)
+        self.assertEqual(self.read(os.path.join(self.docs, 'index.css')), "body { color: red }")
+
+    def test_hash_mode_catches_same_size_edit(self):
+        sync_tree(self.static, self.docs)
+        dst = os.path.join(self.docs, 'index.css')
+        src = os.path.join(self.static, 'index.css')
+        self.write(dst, "body {!")
+        os.utime(dst, ns=(os.stat(src).st_atime_ns, os.stat(src).st_mtime_ns))
+        self.assertTrue(files_match(src, dst))
+        self.assertFalse(files_match(src, dst, use_hash=True))
+
+    def test_prune_only_previously_synced(self):
+        _, synced = sync_tree(self.static, self.docs)
+        self.write(os.path.join(self.docs, 'index.html'), "generated page")
+        os.remove(os.path.join(self.static, 'images', 'a.png'))
+        stats, _ = sync_tree(self.static, self.docs, synced)
+        self.assertEqual(stats.removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.docs, 'images')))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, 'index.html')))
+
+    def test_hardlink_mode(self):
+        sync_tree(self.static, self.docs, mode='hardlink')
+        src = os.stat(os.path.join(self.static, 'index.css'))
+        dst = os.stat(os.path.join(self.docs, 'index.css'))
+        self.assertEqual(src.st_ino, dst.st_ino)
+
+    def test_hardlink_replace_does_not_touch_source(self):
+        sync_tree(self.static, self.docs, mode='hardlink')
+        self.write(os.path.join(self.static, 'index.css'), "new contents")
+        sync_tree(self.static, self.docs, mode='copy')
+        self.assertEqual(self.read(os.path.join(self.static, 'index.css')), "new contents")
+
+    def test_reflink_mode(self):
+        sync_tree(self.static, self.docs, mode='reflink')
+        self.assertEqual(self.read(os.path.join(self.docs, 'images', 'a.png')), "png bytes")
+        stats, _ = sync_tree(self.static, self.docs, mode='reflink')
+        self.assertEqual(stats.skipped, 2)
+
+    def test_bad_mode(self):
+        with self.assertRaises(ValueError):
+            sync_tree(self.static, self.docs, mode='teleport')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import io
+import unittest
+
+from src.template import Template, rewrite_urls
+from src.render_context import RenderContext
+from src.htmlnode import LeafNode, ParentNode
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_segments(self):
+        template = Template.compile("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(template.slots, ['Title', 'Content'])
+        self.assertEqual(template.segments, ['<title>', '</title><body>', '</body>'])
+
+    def test_render(self):
+        template = Template.compile("<title>{{ Title }}</title>{{ Content }}")
+        html = template.render({'Title': 'Hi', 'Content': '<p>yo</p>'})
+        self.assertEqual(html, "<title>Hi</title><p>yo</p>")
+
+    def test_loose_whitespace_placeholder(self):
+        template = Template.compile("{{Title}}|{{   Content }}")
+        self.assertEqual(template.render({'Title': 'a', 'Content': 'b'}), "a|b")
+
+    def test_unknown_placeholder(self):
+        with self.assertRaises(ValueError):
+            Template.compile("{{ Title }}{{ Content }}{{ Author }}")
+
+    def test_malformed_placeholder(self):
+        with self.assertRaises(ValueError):
+            Template.compile("{{ Title }{{ Content }}")
+
+    def test_missing_content(self):
+        with self.assertRaises(ValueError):
+            Template.compile("<title>{{ Title }}</title>")
+
+    def test_base_path_in_static_segments(self):
+        template = Template.compile('<link href="/index.css" />{{ Content }}', RenderContext('/site/'))
+        self.assertEqual(template.segments[0], '<link href="/site/index.css" />')
+
+    def test_values_not_rewritten(self):
+        # Content already has its urls fixed by the converter, anything that looks like a url in it is text
+        template = Template.compile('{{ Content }}', RenderContext('/site/'))
+        html = template.render({'Content': '<code>href="/blog"</code>'})
+        self.assertEqual(html, '<code>href="/blog"</code>')
+
+    def test_rewrite_urls_leaves_external(self):
+        html = '<a href="https://x.com/">x</a><a href="/x">y</a><script src="//cdn/a.js">'
+        self.assertEqual(rewrite_urls(html, RenderContext('/site/')), '<a href="https://x.com/">x</a><a href="/site/x">y</a><script src="//cdn/a.js">')
+
+    def test_hash_changes_with_text(self):
+        one = Template.compile("{{ Content }}")
+        two = Template.compile("<p>{{ Content }}</p>")
+        self.assertNotEqual(one.hash, two.hash)
+
+    def test_write_streams_nodes(self):
+        template = Template.compile('<title>{{ Title }}</title>{{ Content }}', RenderContext('/site/'))
+        node = ParentNode('div', [LeafNode('a', 'home', {'href': '/'})])
+        stream = io.StringIO()
+        template.write(stream, {'Title': 'T', 'Content': node})
+        self.assertEqual(stream.getvalue(), template.render({'Title': 'T', 'Content': node.to_html()}))
+
+
+if __name__ == "__main__":
+    unittest.main()
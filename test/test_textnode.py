@@ -13,6 +13,9 @@ class TestTextNode(unittest.TestCase):
 
  
     
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(TextNode("x", TextType.TEXT), '__dict__'))
+
     def test_eq_bold(self):
         node = TextNode("This is a text node", TextType.BOLD)
         node2 = TextNode("This is a text node", TextType.BOLD)
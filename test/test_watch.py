@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from src.manifest import BuildManifest
+from src.main import generate_pages_recursive
+from src.watch import SiteWatcher, snapshot, diff_snapshots
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, 'content')
+        self.static = os.path.join(root, 'static')
+        self.docs = os.path.join(root, 'docs')
+        self.template = os.path.join(root, 'template.html')
+        os.makedirs(os.path.join(self.content, 'blog'))
+        os.makedirs(self.static)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, 'index.md'), "# Home\n\nhome")
+        self.write(os.path.join(self.content, 'blog', 'index.md'), "# Blog\n\nblog")
+        self.write(os.path.join(self.static, 'index.css'), "body {}")
+
+        self.manifest = BuildManifest(os.path.join(root, 'manifest.json'), '/')
+        with redirect_stdout(StringIO()):
+            generate_pages_recursive(self.content, self.template, self.docs, '/', self.manifest)
+        self.watcher = SiteWatcher(self.content, self.static, self.template, self.docs, '/', self.manifest)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as dest:
+            dest.write(text)
+        # make sure the poll sees a new mtime even on coarse clocks
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def read(self, path):
+        with open(path) as src:
+            return src.read()
+
+    def poll(self):
+        with redirect_stdout(StringIO()):
+            return self.watcher.poll()
+
+    def test_diff_snapshots(self):
+        changed, removed = diff_snapshots({'a': (1, 1), 'b': (1, 1)}, {'a': (2, 1), 'c': (1, 1)})
+        self.assertEqual(changed, {'a', 'c'})
+        self.assertEqual(removed, {'b'})
+
+    def test_snapshot_relative_paths(self):
+        self.assertEqual(sorted(snapshot(self.content)), ['blog/index.md', 'index.md'])
+
+    def test_nothing_changed(self):
+        self.assertFalse(self.poll())
+
+    def test_changed_markdown_only_rebuilds_that_page(self):
+        home = os.path.join(self.docs, 'index.html')
+        os.utime(home, (0, 0))
+        self.write(os.path.join(self.content, 'blog', 'index.md'), "# Blog\n\nnew post")
+        self.assertTrue(self.poll())
+        self.assertIn('new post', self.read(os.path.join(self.docs, 'blog', 'index.html')))
+        self.assertEqual(os.stat(home).st_mtime, 0)
+
+    def test_deleted_markdown_removes_output(self):
+        os.remove(os.path.join(self.content, 'blog', 'index.md'))
+        self.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, 'blog', 'index.html')))
+
+    def test_template_change_rebuilds_everything(self):
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.poll()
+        self.assertTrue(self.read(os.path.join(self.docs, 'index.html')).startswith('<main>'))
+        self.assertTrue(self.read(os.path.join(self.docs, 'blog', 'index.html')).startswith('<main>'))
+
+    def test_static_change_synced(self):
+        self.write(os.path.join(self.static, 'extra.css'), "p {}")
+        self.poll()
+        self.assertEqual(self.read(os.path.join(self.docs, 'extra.css')), "p {}")
+        os.remove(os.path.join(self.static, 'extra.css'))
+        self.poll()
+        self.assertFalse(os.path.exists(os.path.join(self.docs, 'extra.css')))
+
+    def test_broken_markdown_keeps_watching(self):
+        self.write(os.path.join(self.content, 'index.md'), "# Home\n\nhalf **typed")
+        self.assertTrue(self.poll())
+
+
+if __name__ == "__main__":
+    unittest.main()